@@ -5,16 +5,25 @@
 # Python 3 Required.
 
 import time
+import threading
 import inspect,os
 import sys
 import argparse
-from urllib.request import urlopen
+import heapq
+import random
+import re
+import gzip
+import base64
+import http.client
+from urllib.parse import urlsplit, urljoin, unquote
+from urllib.request import getproxies, proxy_bypass_environment
 from PIL import ImageFont, Image, ImageDraw
 from luma.core.render import canvas
 from luma.core.interface.serial import spi
 from luma.core import cmdline
-from lxml import objectify
-from datetime import datetime
+from lxml import objectify, etree
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo
 from luma.core.image_composition import ImageComposition, ComposableImage
 
 ###
@@ -43,13 +52,16 @@ def check_time(value):
 ## Defines all optional paramaters
 parser = argparse.ArgumentParser(description='Reading Buses Live Departure Board, to run the program you will need to pass it all of the required paramters and you may wish to pass any optional paramters.')
 parser.add_argument("-t","--TimeFormat", help="Do you wish to use 24hr or 12hr time format; default is 24hr.", type=int,choices=[12,24],default=24)
+parser.add_argument("--TimeZone", help="The time zone the API gives times in and the display shows them in; default is Europe/London", type=str,default="Europe/London")
 parser.add_argument("-v","--Speed", help="What speed do you want the text to scroll at on the display; default is 3, must be greater than 0.", type=check_positive,default=3)
 parser.add_argument("-d","--Delay", help="How long the display will pause before starting the next animation; default is 30, must be greater than 0.", type=check_positive,default=30)
-parser.add_argument("-r","--RecoveryTime", help="How long the display will wait before attempting to get new data again after previously failing; default is 100, must be greater than 0.", type=check_positive,default=100)
+parser.add_argument("-r","--RecoveryTime", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, see BackoffBase and BackoffMax", type=check_positive,default=100)
+parser.add_argument("--BackoffBase", help="How long the display will wait before requesting new data from an API again after it fails, doubling each time it fails again in a row; default is 30(seconds)", type=check_positive,default=30)
+parser.add_argument("--BackoffMax", help="The longest the display will wait before requesting new data from an API again after it fails; default is 900(seconds)", type=check_positive,default=900)
 parser.add_argument("-n","--NumberOfCards", help="The maximum number of cards you will see before forcing a new data retrieval, a limit is recommend to prevent cycling through data which may become out of data or going too far into scheduled buses; default is 9, must be greater than 0.", type=check_positive,default=9)
 parser.add_argument("-y","--Rotation", help="Defines which way up the screen is rendered; default is 0", type=int,default=0,choices=[0,2])
 parser.add_argument("-l","--RequestLimit", help="Defines the minium amount of time the display must wait before making a new data request; default is 55(seconds)", type=check_positive,default=55)
-parser.add_argument("-z","--StaticUpdateLimit", help="Defines the amount of time the display will wait before updating the expected arrival time (based upon it's last known predicted arrival time); default is  15(seconds), this should be lower than your 'RequestLimit'", type=check_positive,default=15)
+parser.add_argument("-z","--StaticUpdateLimit", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, the time shown is updated whenever it changes", type=check_positive,default=15)
 parser.add_argument("-e","--EnergySaverMode", help="To save screen from burn in and prolong it's life it is recommend to have energy saving mode enabled. 'off' is default, between the hours set the screen will turn off. 'dim' will turn the screen brightness down, but not completely off. 'none' will do nothing and leave the screen on; this is not recommend, you can change your active hours instead.", type=str,choices=["none","dim","off"],default="none")
 parser.add_argument("-i","--InactiveHours", help="The period of time for which the display will go into 'Energy Saving Mode' if turned on; default is '23:00-07:00'", type=check_time,default="23:00-07:00")
 parser.add_argument("-u","--UpdateDays", help="The number of days for which the Pi will wait before rebooting and checking for a new update again during your energy saving period; default 1 days (every night check).", type=check_positive, default=1)
@@ -63,6 +75,13 @@ parser.add_argument("--Display", default="ssd1322", choices=['ssd1322','pygame',
 parser.add_argument("--max-frames", default=60,dest='maxframes', type=check_positive, help="Used only when using gifanim emulator, sets how long the gif should be.")
 parser.add_argument("--no-console-output",dest='NoConsole', action='store_true', help="Used to stop the program outputting anything to console that isn't an error message, you might want to do this if your logging the program output into a file to record crashes.")
 parser.add_argument("--filename",dest='filename', default="output.gif", help="Used mainly for development, if using a gifanim display, this can be used to set the output gif file name, this should always end in .gif.")
+parser.add_argument("--Online", help="Show the demo services from the project website instead of the copy saved with the program.", dest='Online', action='store_true')
+parser.add_argument("--Synthetic", help="Used for testing, shows this many made up services instead of the demo services. Use with a matching '--NumberOfCards' to cycle through all of them.", type=check_positive)
+parser.add_argument("--SyntheticLines", help="The number of different lines the made up services are spread over; default is 12, must be greater than 0.", type=check_positive, default=12)
+parser.add_argument("--SyntheticVia", help="The number of places in each made up service's via message; default is 6, must be greater than 0.", type=check_positive, default=6)
+parser.add_argument("--Seed", help="Used for testing, makes the made up services the same on every run.", type=int)
+parser.add_argument("--ConnectTimeout", help="How long to wait when connecting to the API before giving up; default is 5(seconds), must be greater than 0.", type=check_positive, default=5)
+parser.add_argument("--ReadTimeout", help="How long to wait for the API to respond before giving up; default is 15(seconds), must be greater than 0.", type=check_positive, default=15)
 parser.add_argument("--no-pip-update",dest='NoPipUpdate',  action='store_true', default=False, help="By default, the program will update any software dependencies/ pip libraries, this is to ensure your display still works correctly and has the required security updates. However, if you wish you can use this tag to disable pip updates and downloads. ")
 
 Args = parser.parse_args()
@@ -74,6 +93,122 @@ BasicFont = ImageFont.truetype("%s/resources/lower.ttf" %(os.path.dirname(os.pat
 # Defines the place holder via message when one can not be found/ given in the API.
 GenericVia = "Via Central Reading"
 
+###
+# Below contains the HTTP client used for every request made to the API.
+###
+# The result of a request, with the body already read and decompressed. It can be used in the same way as the response from urlopen.
+class HttpResponse():
+	def __init__(self, status, headers, body):
+		self.status = status
+		self.headers = headers
+		self.body = body
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		return False
+
+	def read(self):
+		return self.body
+
+	def getcode(self):
+		return self.status
+
+# Keeps connections open to each website between requests, so each request does not pay for looking up the website and connecting (the TLS handshake) again.
+# Responses are requested compressed, and connecting and waiting for a response are both given a time limit so a bad connection can not hang the display.
+class HttpClient():
+	def __init__(self, connectTimeout, readTimeout):
+		self.connectTimeout = connectTimeout
+		self.readTimeout = readTimeout
+		self.lock = threading.Lock()
+		# Open connections not currently in use, by scheme and host. More than one may be open when requests are made at the same time.
+		self.idle = {}
+		# The proxies set in the environment, by scheme.
+		self.proxies = getproxies()
+
+	# Returns the proxy to use for the host from the environment (HTTPS_PROXY, HTTP_PROXY and NO_PROXY) as urlopen does, or None to connect directly.
+	def proxy(self, scheme, host):
+		proxy = self.proxies.get(scheme)
+		if not proxy or proxy_bypass_environment(host, self.proxies):
+			return None
+		return urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+	# Returns the headers to log in to the proxy with, if it needs it.
+	@staticmethod
+	def ProxyHeaders(proxy):
+		if not proxy.username:
+			return {}
+		login = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+		return {"Proxy-Authorization": "Basic " + base64.b64encode(login.encode()).decode()}
+
+	# Returns an open connection to the host and whether it has been used before.
+	def connection(self, scheme, host):
+		with self.lock:
+			if self.idle.get((scheme, host)):
+				return self.idle[(scheme, host)].pop(), True
+		proxy = self.proxy(scheme, host)
+		if proxy is not None and scheme == "https":
+			# Secure requests are tunnelled through the proxy to the host.
+			conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+			conn.set_tunnel(host, headers=self.ProxyHeaders(proxy))
+		elif proxy is not None:
+			conn = http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+		elif scheme == "https":
+			conn = http.client.HTTPSConnection(host, timeout=self.connectTimeout)
+		else:
+			conn = http.client.HTTPConnection(host, timeout=self.connectTimeout)
+		conn.connect()
+		conn.sock.settimeout(self.readTimeout)
+		return conn, False
+
+	def release(self, scheme, host, conn):
+		with self.lock:
+			self.idle.setdefault((scheme, host), []).append(conn)
+
+	# Makes a GET request, following any redirects, and returns a HttpResponse. Like urlopen an error is raised if the request failed.
+	def get(self, url, headers={}, redirects=3):
+		parts = urlsplit(url)
+		path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+		sendHeaders = {"Accept-Encoding": "gzip", "User-Agent": "Mozilla/5.0"}
+		sendHeaders.update(headers)
+		proxy = self.proxy(parts.scheme, parts.netloc)
+		if proxy is not None and parts.scheme == "http":
+			# Plain requests through a proxy ask it for the whole URL.
+			path = url
+			sendHeaders.update(self.ProxyHeaders(proxy))
+
+		for attempt in range(2):
+			conn, reused = self.connection(parts.scheme, parts.netloc)
+			try:
+				conn.request("GET", path, headers=sendHeaders)
+				response = conn.getresponse()
+				body = response.read()
+				break
+			except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+				conn.close()
+				# The website may have closed a connection which had been left open, if so try again once with a new one.
+				if not reused or attempt == 1:
+					raise
+			except Exception:
+				conn.close()
+				raise
+
+		if response.will_close:
+			conn.close()
+		else:
+			self.release(parts.scheme, parts.netloc, conn)
+
+		if response.getheader("Content-Encoding", "") == "gzip":
+			body = gzip.decompress(body)
+		if response.status in (301, 302, 303, 307, 308) and response.getheader("Location") and redirects > 0:
+			return self.get(urljoin(url, response.getheader("Location")), headers, redirects - 1)
+		if response.status >= 400:
+			raise Exception("HTTP Error %d: %s" % (response.status, response.reason))
+		return HttpResponse(response.status, response.msg, body)
+
+Http = HttpClient(Args.ConnectTimeout, Args.ReadTimeout)
+
 ###
 # Below contains the class which is used to reperesent one instance of a service record. It is also responsible for getting the information from the Reading Buses API.
 ###
@@ -87,22 +222,100 @@ class LiveTimeStud():
 		self.ExptArrival = " "
 		self.Via = " "
 		self.ID =  "0"
-	
-	def TimePassedStatic(self):
-		return False
 		
 	
+# The times of a service, converted once when the data is retrieved instead of every time they are shown. Every time is in seconds since the epoch.
+class Departure():
+	__slots__ = ("Scheduled", "Expected")
+	# The time zone the API gives local times in. Its offset from UTC and when its last midnight was are worked out by Refresh().
+	Zone = ZoneInfo(Args.TimeZone)
+	Offset = 0
+	Midnight = 0
+	# The first day of the epoch, as counted by date.toordinal().
+	Epoch = date(1970, 1, 1).toordinal()
+
+	def __init__(self, Scheduled, Expected):
+		self.Scheduled = Scheduled
+		# The predicted time, None if it is not known.
+		self.Expected = Expected
+
+	# Returns the predicted time if known, else the time tabled time.
+	def Best(self):
+		return self.Scheduled if self.Expected is None else self.Expected
+
+	# Returns how many minutes until the service is due, negative once it should have already gone.
+	def MinutesUntil(self):
+		return (self.Best() - time.time()) / 60
+
+	# Returns when a count down to the time next changes, in seconds since the epoch: when it comes within 'Limit' minutes, then as each
+	# whole minute passes until it is within 'Due' minutes, where it stays the same. Returns None once it will not change again.
+	def NextChange(self, Due, Limit):
+		Seconds = self.Best()
+		left = Seconds - time.time()
+		if left <= Due * 60:
+			return None
+		if left >= Limit * 60:
+			return Seconds - Limit * 60
+		return Seconds - int(left // 60) * 60
+
+	# Works out the time zone's offset from UTC, and when its last midnight was, once each time new data is retrieved instead of for every time converted.
+	@staticmethod
+	def Refresh():
+		now = int(time.time())
+		Departure.Offset = int(datetime.fromtimestamp(now, Departure.Zone).utcoffset().total_seconds())
+		Departure.Midnight = (now + Departure.Offset) // 86400 * 86400 - Departure.Offset
+
+	# Converts a date and time ("YYYY-MM-DDTHH:MM:SS", anything after is ignored) to seconds since the epoch as if it were UTC, raising ValueError if a field is not a number.
+	# The APIs always give it in this one format, so each field is read from where it always is, which is far quicker than strptime.
+	@staticmethod
+	def Seconds(Text):
+		return (date(int(Text[0:4]), int(Text[5:7]), int(Text[8:10])).toordinal() - Departure.Epoch) * 86400 + int(Text[11:13]) * 3600 + int(Text[14:16]) * 60 + int(Text[17:19])
+
+	# Converts a date and time ("YYYY-MM-DDTHH:MM:SS", optionally followed by fractions of a second and a "Z" or "+HH:MM" offset) to seconds since the epoch.
+	# A time given with an offset is read in that offset, so it is still right either side of a clock change, else it is in the time zone.
+	# Returns None if it is not given or not in this form.
+	@staticmethod
+	def FromISO(Text):
+		if len(Text) < 19 or Text[4] != "-" or Text[7] != "-" or Text[10] != "T" or Text[13] != ":" or Text[16] != ":":
+			return None
+		try:
+			Seconds = Departure.Seconds(Text)
+			Zone = Text[19:].lstrip("0123456789.")
+			if not Zone:
+				return Seconds - Departure.Offset
+			if Zone == "Z":
+				return Seconds
+			Digits = Zone[1:].replace(":", "")
+			if Zone[0] not in "+-" or len(Digits) != 4 or not Digits.isdigit():
+				return None
+			Offset = int(Digits[0:2]) * 3600 + int(Digits[2:4]) * 60
+			return Seconds - Offset if Zone[0] == "+" else Seconds + Offset
+		except ValueError:
+			return None
+
+	# Returns a time in seconds since the epoch as shown on the display, in the time zone.
+	@staticmethod
+	def Clock(Seconds):
+		return time.strftime("%H:%M" if (Args.TimeFormat==24) else "%I:%M", time.gmtime(Seconds + Departure.Offset))
+
+
 # Used to get live data from the Reading Buses API and represent a specific services and it's details.
 class LiveTime(object):
 	# The last time an API call was made to get new data.
 	LastUpdate = datetime.now()
+	# How a service can have changed from one lot of data to the next, as far as what is shown on the display.
+	ServiceChanges = ["unchanged", "time-changed", "new", "departed"]
 	
 	# * Change this method to implement your own API *
 	def __init__(self, Data, Index):
 		self.ServiceNumber = "%s.%s" % (Index + 1, str(Data.LineRef)) if Args.ShowIndex else str(Data.LineRef)
 		self.Destination = str(Data.DestinationName)
-		self.SchArrival = str(Data.MonitoredCall.AimedArrivalTime).split("+")[0]
-		self.ExptArrival = str(getattr( Data.MonitoredCall, "ExpectedArrivalTime", "")).split("+")[0]
+		self.SchArrival = str(Data.MonitoredCall.AimedArrivalTime)
+		self.ExptArrival = str(getattr( Data.MonitoredCall, "ExpectedArrivalTime", ""))
+		# The times converted once, so they are not converted again each time they are shown.
+		self.Times = Departure(Departure.FromISO(self.SchArrival), Departure.FromISO(self.ExptArrival))
+		if self.Times.Scheduled is None:
+			raise ValueError("Unable to read the scheduled time '%s'" % self.SchArrival)
 		# The "Via" message, which lists where the service will go through, if unknown use generic message.
 		self.Via = str(getattr(Data, "Via", GenericVia))
 		# The formated string containing the time of arrival, to be printed on the display screen.
@@ -111,57 +324,167 @@ class LiveTime(object):
 	
 	#Returns the value to display the time on the board.
 	def GetDisplayTime(self):
-		# Last time the display screen was updated to reflect the new time of arrival.
-		self.LastStaticUpdate = datetime.now()
 		# If unknown predicted time use scheduled (time tabled) time.
-		if self.ExptArrival == "":
-			return " " + datetime.strptime(self.SchArrival, '%Y-%m-%dT%H:%M:%S').strftime("%H:%M" if (Args.TimeFormat==24) else  "%I:%M")
+		if self.Times.Expected is None:
+			return " " + Departure.Clock(self.Times.Scheduled)
 		else:
-			Diff =  (datetime.strptime(self.ExptArrival, '%Y-%m-%dT%H:%M:%S') - datetime.now()).total_seconds() / 60
+			Diff = self.Times.MinutesUntil()
 			if Diff <= 2:
 				return ' Due'
 			# If more than 15min away show the time as 'XX:XX', else show it as a count down in 'X min'
 			if Diff >=15 :
-				return ' ' + datetime.strptime(self.SchArrival, '%Y-%m-%dT%H:%M:%S').strftime("%H:%M" if (Args.TimeFormat==24) else  "%I:%M")
+				return ' ' + Departure.Clock(self.Times.Scheduled)
 			return  ' %d min' % Diff
 
+	# Compares a service with the same service from newer data, returning what has changed of what is shown on the display.
+	# Any change other than the time means the whole card has to be drawn again, so is treated as a new service.
+	@staticmethod
+	def ClassifyService(old, new):
+		if old is None:
+			return "new"
+		if new is None:
+			return "departed"
+		if (old.ServiceNumber, old.Destination, old.Via) != (new.ServiceNumber, new.Destination, new.Via):
+			return "new"
+		if old.DisplayTime != new.DisplayTime:
+			return "time-changed"
+		return "unchanged"
+
+	# Compares the last and newest services, returning how each has changed by ID, including those no longer given as departed.
+	@staticmethod
+	def DiffServices(old, new):
+		previous = {service.ID: service for service in old}
+		changes = {service.ID: LiveTime.ClassifyService(previous.get(service.ID), service) for service in new}
+		for ID in previous:
+			if ID not in changes:
+				changes[ID] = "departed"
+		return changes
+
+	# Returns true if the service has already arrived, using the time tabled time if the predicted time is unknown.
+	def HasDeparted(self):
+		return self.Times.MinutesUntil() < 0
+
 	# Returns true or false dependent upon if the last time an API data call was made was over the request limit; to prevent spamming the API feed.
 	@staticmethod
 	def TimePassed():
 		return (datetime.now() - LiveTime.LastUpdate).total_seconds() > Args.RequestLimit
 
-	# Return true or false dependent upon if the last time the display was updated was over the static update limit. This prevents updating the display to frequently to increase performance.
-	def TimePassedStatic(self):
-		return ("min" in self.DisplayTime) and (datetime.now() - self.LastStaticUpdate).total_seconds() > Args.StaticUpdateLimit 
+	# Returns when the time shown for the service next changes, in seconds since the epoch, or None if it will not change again.
+	def NextLabelChange(self):
+		if self.Times.Expected is None:
+			return None
+		return self.Times.NextChange(2, 15)
+
+	# Moves every time in the saved demo services so the first bus is due now, keeping the gaps between them.
+	@staticmethod
+	def Rebase(raw):
+		times = re.findall(rb"<AimedArrivalTime>([^<+]*)", raw)
+		if not times:
+			return raw
+		# The times are written in the time zone they are read back in, so the saved offset is dropped.
+		shift = datetime.now(Departure.Zone).replace(tzinfo=None, second=0, microsecond=0) - datetime.strptime(min(times).decode(), '%Y-%m-%dT%H:%M:%S')
+
+		def move(match):
+			moved = datetime.strptime(match.group(2).decode(), '%Y-%m-%dT%H:%M:%S') + shift
+			return match.group(1) + moved.strftime('%Y-%m-%dT%H:%M:%S').encode()
+		return re.sub(rb"(<(?:Aimed|Expected)ArrivalTime>)([^<+]*)[^<]*", move, raw)
+
+	# Place names used for the made up services.
+	SyntheticPlaces = ["Broad Street", "Oxford Road", "Norcot", "Tilehurst", "Station Hill", "Caversham Bridge", "Church Road", "Kings Road", "London Road", "Cemetery Junction",
+		"Three Tuns", "Palmer Park", "Wokingham Road", "Winnersh", "Sindlesham", "Whiteknights", "Earley", "Lower Earley", "Basingstoke Road", "Whitley Wood",
+		"Shinfield Road", "Maiden Place", "Southcote", "Bath Road", "Calcot", "Prospect Park", "Honey End Lane", "Kentwood Hill", "Mapledurham", "Emmer Green",
+		"Woodley", "Twyford", "Theale", "Purley", "Pangbourne", "Arborfield", "Spencers Wood", "Three Mile Cross", "Coley", "Southampton Street"]
+
+	# Makes up a SIRI response with the given number of services, to test the board with far more services than any real stop.
+	# Each line runs at its own regular interval with some variation. Most buses are tracked and running a little late, a few are early or not tracked.
+	@staticmethod
+	def Synthetic(count):
+		rng = random.Random(Args.Seed)
+		# The times are written in the time zone they are read back in.
+		now = datetime.now(Departure.Zone).replace(tzinfo=None)
+		lines = []
+		upcoming = []
+		for index in range(Args.SyntheticLines):
+			places = rng.sample(LiveTime.SyntheticPlaces, min(len(LiveTime.SyntheticPlaces), Args.SyntheticVia + 1))
+			headway = rng.choice([6, 8, 10, 12, 15, 20, 30])
+			lines.append(("%s%d" % (rng.choice(["", "", "", "X", "N"]), index + 1), places[-1], "Via " + ", ".join(places[:-1]), headway))
+			upcoming.append((rng.uniform(0, headway), index, 0))
+
+		# Take the next bus of whichever line is soonest until there are enough.
+		heapq.heapify(upcoming)
+		visits = []
+		while len(visits) < count:
+			aimed, index, journey = heapq.heappop(upcoming)
+			expected = aimed + rng.gammavariate(2, 1) - 0.5 if rng.random() < 0.85 else None
+			visits.append((aimed if expected is None else expected, aimed, expected, index, journey))
+			heapq.heappush(upcoming, (aimed + max(1, rng.gauss(lines[index][3], lines[index][3] * 0.15)), index, journey + 1))
+		visits.sort()
+
+		ns = "{http://www.siri.org.uk/siri}"
+		root = etree.Element(ns + "Siri", nsmap={None: ns[1:-1]})
+		delivery = etree.SubElement(etree.SubElement(root, ns + "ServiceDelivery"), ns + "StopMonitoringDelivery")
+		for order, aimed, expected, index, journey in visits:
+			name, destination, via, headway = lines[index]
+			service = etree.SubElement(etree.SubElement(delivery, ns + "MonitoredStopVisit"), ns + "MonitoredVehicleJourney")
+			etree.SubElement(service, ns + "LineRef").text = name
+			etree.SubElement(etree.SubElement(service, ns + "FramedVehicleJourneyRef"), ns + "DatedVehicleJourneyRef").text = "%s_%d" % (name, journey)
+			etree.SubElement(service, ns + "DestinationName").text = destination
+			etree.SubElement(service, ns + "Via").text = via
+			call = etree.SubElement(service, ns + "MonitoredCall")
+			etree.SubElement(call, ns + "AimedArrivalTime").text = (now + timedelta(minutes=aimed)).strftime('%Y-%m-%dT%H:%M:%S')
+			if expected is not None:
+				etree.SubElement(call, ns + "ExpectedArrivalTime").text = (now + timedelta(minutes=expected)).strftime('%Y-%m-%dT%H:%M:%S')
+		return etree.tostring(root)
+
+	# Returns the services to show as a SIRI response, made up if synthetic, from the project website if online, or else from the copy saved with the program.
+	@staticmethod
+	def GetRawData():
+		if Args.Synthetic:
+			return LiveTime.Synthetic(Args.Synthetic)
+		if Args.Online:
+			with Http.get("https://jonathanfoot.com/Projects/DepartureBoard/Assets/demoFile.xml") as conn:
+				return conn.read()
+		with open("%s/resources/demoFile.xml" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))), "rb") as file:
+			return LiveTime.Rebase(file.read())
 
 	# Calls the API and gets the data from it, returning a list of LiveTime objects to be used in the program.
 	# * Change this method to implement your own API *
 	@staticmethod
 	def GetData():
 		LiveTime.LastUpdate = datetime.now()
+		Departure.Refresh()
 		services = []
+		breaker = CircuitBreaker.For("demo data")
+		if not breaker.allow():
+			return None
 
 		try:
-			with urlopen("https://jonathanfoot.com/Projects/DepartureBoard/Assets/demoFile.xml") as conn:
-				rawServices = objectify.fromstring(conn.read())
+			start = time.time()
+			rawServices = objectify.fromstring(LiveTime.GetRawData())
 			
-				# The Reading Buses API sometimes reports the same bus multiple times. To work around this we need to check if we have already found it.
-				for root in rawServices.ServiceDelivery.StopMonitoringDelivery.MonitoredStopVisit:
-					service = root.MonitoredVehicleJourney
-					exists = False
-					for current in services:
-						if current.ID == service.FramedVehicleJourneyRef.DatedVehicleJourneyRef:
-							exists = True
-							break
-					# If not already recorded and not in the excluded services list add it.
-					if exists == False and str(service.LineRef) not in Args.ExcludeServices:
-						# Convert the custom Reading Buses API object into a LiveTime object and add it to the list.
+			# The Reading Buses API sometimes reports the same bus multiple times. To work around this we need to check if we have already found it.
+			for root in rawServices.ServiceDelivery.StopMonitoringDelivery.MonitoredStopVisit:
+				service = root.MonitoredVehicleJourney
+				exists = False
+				for current in services:
+					if current.ID == service.FramedVehicleJourneyRef.DatedVehicleJourneyRef:
+						exists = True
+						break
+				# If not already recorded and not in the excluded services list add it.
+				if exists == False and str(service.LineRef) not in Args.ExcludeServices:
+					# Convert the custom Reading Buses API object into a LiveTime object and add it to the list, leaving out any whose time cannot be read.
+					try:
 						services.append(LiveTime(service, len(services)))
+					except ValueError as e:
+						print_safe("Skipping service %s - %s" % (service.FramedVehicleJourneyRef.DatedVehicleJourneyRef, str(e)))
+			print_safe("Got %d services in %.3fs" % (len(services), time.time() - start))
+			breaker.success()
 			return services
 		except Exception as e:
+			breaker.failure()
 			print("GetData() ERROR")
 			print(str(e))
-			return []
+			return None
 
 
 ###
@@ -180,6 +503,26 @@ class TextImage():
 		self.height = 5 + BasicFontHeight
 		del draw
 
+# Keeps the images of the times shown on the board, so each is only drawn once rather than every time it changes.
+# Every count down label is drawn when the display starts, any other (such as 'HH:MM') the first time it is shown.
+class LabelAtlas():
+	# How many labels drawn when first shown are kept before they are all forgotten, so a board left running does not keep every time of day.
+	Limit = 256
+
+	def __init__(self, device, labels):
+		self.device = device
+		self.Labels = dict((label, TextImage(device, label)) for label in labels)
+		self.Shown = {}
+
+	# Returns the image of the label, only drawing it if it has not been already.
+	def get(self, label):
+		image = self.Labels.get(label) or self.Shown.get(label)
+		if image is None:
+			if len(self.Shown) >= self.Limit:
+				self.Shown.clear()
+			image = self.Shown[label] = TextImage(self.device, label)
+		return image
+
 # Used to create the destination and via board.
 class TextImageComplex():
 	def __init__(self, device, destination, via, startOffset):
@@ -197,16 +540,17 @@ class StaticTextImage():
 	def __init__(self, device, service, previous_service):			
 		self.image = Image.new(device.mode, (device.width, 32))
 		draw = ImageDraw.Draw(self.image)
-		displayTimeTempPrevious = TextImage(device, previous_service.DisplayTime)
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTempPrevious = Labels.get(previous_service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
+		# The times are copied from the label atlas rather than drawn, before the rest of the text is drawn over them.
+		self.image.paste(displayTimeTemp.image, (device.width - displayTimeTemp.width, 16))
+		self.image.paste(displayTimeTempPrevious.image, (device.width - displayTimeTempPrevious.width, 0))
 
 		draw.text((0, 16), service.ServiceNumber, font=BasicFont, fill="white")
-		draw.text((device.width - displayTimeTemp.width, 16), service.DisplayTime, font=BasicFont, fill="white")
 		draw.text((45 if Args.ShowIndex else 30, 16), service.Destination, font=BasicFont, fill="white")	
 
 		draw.text((45 if Args.ShowIndex else 30, 0), previous_service.Destination, font=BasicFont, fill="white")	
 		draw.text((0, 0), previous_service.ServiceNumber, font=BasicFont, fill="white")
-		draw.text((device.width - displayTimeTempPrevious.width, 0), previous_service.DisplayTime, font=BasicFont, fill="white")
 	
 		self.width = device.width 
 		self.height = 32
@@ -280,6 +624,9 @@ class ScrollTime():
 	STUD_END = 9
 
 	STUD = -1
+
+	# The number of images which have not needed drawing again since it was last reset, as what they show had not changed.
+	RendersAvoided = 0
 	
 	def __init__(self, image_composition, service, previous_service, scroll_delay, synchroniser, device, position, controller):
 		self.speed = Args.Speed
@@ -309,10 +656,13 @@ class ScrollTime():
 		self.synchroniser = synchroniser
 		self.render()
 		self.synchroniser.ready(self)
+		# Set by the countdown scheduler when the time shown is due to change.
+		self.LabelDue = False
+		Countdown.schedule(self)
 
 	# Generates all the Images (Text boxes) to be drawn on the display.
 	def generateCard(self,service):
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
 		IDestinationTemp  = TextImageComplex(device, service.Destination,service.Via, displayTimeTemp.width)
 
 		self.IDestination =  ComposableImage(IDestinationTemp.image.crop((0,0,IDestinationTemp.width + 10,16)), position=(45 if Args.ShowIndex else 30, 16 * self.position))
@@ -321,11 +671,21 @@ class ScrollTime():
 
 	# Called when you have new/updated information from an API call and want to update the objects predicted arrival time.
 	def updateCard(self, newService, device):
+		change = LiveTime.ClassifyService(self.CurrentService, newService)
+		if change == "new":
+			self.changeCard(newService, device)
+			return
 		self.state = self.SCROLL_DECIDER
 		self.synchroniser.ready(self)
+		self.CurrentService = newService
+		Countdown.schedule(self)
+		# Only draw the time again if it has changed.
+		if change == "unchanged":
+			ScrollTime.RendersAvoided += 1
+			return
 		self.image_composition.remove_image(self.IDisplayTime)
 
-		displayTimeTemp = TextImage(device, newService.DisplayTime)
+		displayTimeTemp = Labels.get(newService.DisplayTime)
 		self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))
 	
 		self.image_composition.add_image(self.IDisplayTime)
@@ -360,6 +720,7 @@ class ScrollTime():
 
 		self.generateCard(newService)
 		self.CurrentService = newService
+		Countdown.schedule(self)
 		self.max_pos = self.IDestination.width
 		
 		self.state = self.WAIT_STUD if (newService.ID == "0") else self.WAIT_OPENING
@@ -381,14 +742,21 @@ class ScrollTime():
 
 	# Called upon each time you want to get the next frame for the display.
 	def tick(self):
-		#Update X min till arrival.
-		if self.CurrentService.TimePassedStatic() and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
-			self.image_composition.remove_image(self.IDisplayTime)
-			self.CurrentService.DisplayTime = self.CurrentService.GetDisplayTime()
-			displayTimeTemp = TextImage(device, self.CurrentService.DisplayTime)
-			self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
-			self.image_composition.add_image(self.IDisplayTime)
-			self.image_composition.refresh()
+		#Update X min till arrival, once the countdown scheduler has woken the row as it is due to change.
+		if self.LabelDue and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
+			self.LabelDue = False
+			DisplayTime = self.CurrentService.GetDisplayTime()
+			# The time shown only needs drawing again if it has changed.
+			if DisplayTime == self.CurrentService.DisplayTime:
+				ScrollTime.RendersAvoided += 1
+			else:
+				self.CurrentService.DisplayTime = DisplayTime
+				self.image_composition.remove_image(self.IDisplayTime)
+				displayTimeTemp = Labels.get(self.CurrentService.DisplayTime)
+				self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
+				self.image_composition.add_image(self.IDisplayTime)
+				self.image_composition.refresh()
+			Countdown.schedule(self)
 
 
 		if self.state == self.WAIT_OPENING:
@@ -502,13 +870,144 @@ class ScrollTime():
 			return False
 		return True
 
+###
+## Circuit Breaker
+## Stops requesting new data from an API endpoint which keeps failing, waiting longer after each failure before trying it again.
+###
+class CircuitBreaker():
+	# Every endpoint's circuit breaker, by name.
+	Breakers = {}
+
+	def __init__(self, name):
+		self.name = name
+		self.lock = threading.Lock()
+		# closed- requests are made as normal. open- no requests are made until OpenUntil. half-open- one trial request is being made.
+		self.State = "closed"
+		self.failures = 0
+		self.OpenUntil = 0
+
+	# Returns the circuit breaker for the endpoint, creating it the first time.
+	@staticmethod
+	def For(name):
+		if name not in CircuitBreaker.Breakers:
+			CircuitBreaker.Breakers[name] = CircuitBreaker(name)
+		return CircuitBreaker.Breakers[name]
+
+	# Returns true if any endpoint may be requested now, so there is a point in asking for new data.
+	@staticmethod
+	def Ready():
+		now = time.time()
+		return not CircuitBreaker.Breakers or any(breaker.State == "closed" or (breaker.State == "open" and now >= breaker.OpenUntil) for breaker in CircuitBreaker.Breakers.values())
+
+	# Returns true if a request may be made to the endpoint now. Once the wait is over a single trial request is let through.
+	def allow(self):
+		with self.lock:
+			if self.State == "closed":
+				return True
+			if self.State == "open" and time.time() >= self.OpenUntil:
+				self.setState("half-open", "trying again")
+				return True
+			return False
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+			if self.State != "closed":
+				self.setState("closed", "working again")
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			# The wait doubles with each failure in a row, up to the maximum. Half of it is random so many displays do not all try again at once.
+			backoff = min(Args.BackoffMax, Args.BackoffBase * 2 ** min(self.failures - 1, 20))
+			wait = backoff / 2 + random.uniform(0, backoff / 2)
+			self.OpenUntil = time.time() + wait
+			self.setState("open", "%d failures in a row, trying again in %ds" % (self.failures, wait))
+
+	def setState(self, state, reason):
+		self.State = state
+		print_safe("Circuit breaker for %s is %s - %s" % (self.name, state, reason))
+
+
+###
+## Departure Store
+## Keeps the last services retrieved, so the board carries on showing them while new data cannot be retrieved instead of showing "No Services".
+###
+class DepartureStore():
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.Services = []
+		# True when new data could not be retrieved, so the services are from an earlier request.
+		self.Stale = False
+		self.Updated = datetime.now()
+
+	# Keeps newly retrieved services, or if they could not be retrieved (None) marks the last ones as stale. Returns the services to show.
+	def update(self, services):
+		with self.lock:
+			if services is not None:
+				if self.Stale:
+					print_safe("New data retrieved, no longer showing the services from %s" % self.Updated.time())
+				self.Services = services
+				self.Stale = False
+				self.Updated = datetime.now()
+			elif self.Services and not self.Stale:
+				print_safe("Unable to get new data, showing the services from %s until it can be" % self.Updated.time())
+				self.Stale = True
+			return self.prune()
+
+	# Returns the services to show, dropping any which have departed since they were retrieved if they are stale.
+	def current(self):
+		with self.lock:
+			return self.prune()
+
+	# Only stale services are pruned. Fresh data is shown as the API gives it, as a service it still lists has not gone yet.
+	def prune(self):
+		if self.Stale:
+			self.Services = [service for service in self.Services if not service.HasDeparted()]
+		return self.Services
+
+
+###
+## Countdown Scheduler
+## Works out when the time shown on each row will next change, so rows are only woken to update it then instead of checking every frame.
+###
+class CountdownScheduler():
+	# How long after the time shown is due to change to wake the row, as each time is still shown up to and including that moment.
+	Margin = 0.05
+
+	def __init__(self):
+		# The rows to wake, as (time to wake, order added, row, service it was showing).
+		self.heap = []
+		self.added = 0
+
+	# Schedules the row to be woken when the time shown for its service next changes.
+	def schedule(self, row):
+		service = row.CurrentService
+		if service.ID == "0":
+			return
+		# The time shown may already be out of date, if the data was retrieved a while before the row came to show it.
+		when = time.time() if service.GetDisplayTime() != service.DisplayTime else service.NextLabelChange()
+		if when is not None:
+			self.added += 1
+			heapq.heappush(self.heap, (when + self.Margin, self.added, row, service))
+
+	# Called every frame, wakes every row whose time shown is due to change. Otherwise only the soonest is looked at.
+	def tick(self):
+		now = time.time()
+		while self.heap and self.heap[0][0] <= now:
+			when, added, row, service = heapq.heappop(self.heap)
+			# A row which has moved on to another service has already been scheduled again for it.
+			if row.CurrentService is service:
+				row.LabelDue = True
+
+
 ###
 ## Board Controller
 ## Defines the board which controls what each off the rows in the display will show at any time.
 ###
 class boardFixed():
 	def __init__(self, image_composition, scroll_delay, device):
-		self.Services = LiveTime.GetData()   
+		self.Services = Departures.update(LiveTime.GetData())  
 		self.synchroniser = Synchroniser()
 		self.scroll_delay = scroll_delay
 		self.image_composition = image_composition
@@ -532,6 +1031,7 @@ class boardFixed():
 
 	# Called upon every time a new frame is needed.
 	def tick(self):
+		Countdown.tick()
 		#If no data can be found.
 		if len(self.Services) == 0:
 			if self.ticks == 0:
@@ -553,14 +1053,25 @@ class boardFixed():
 			self.middel.tick()
 			self.bottom.tick()
 	
+	# Logs how the services have changed since data was last retrieved, and how many images have not needed drawing again since.
+	def logChanges(self, services):
+		changes = list(LiveTime.DiffServices(self.Services, services).values())
+		print_safe("Services: %s - %d re-renders avoided since the last refresh" % (", ".join("%d %s" % (changes.count(change), change) for change in LiveTime.ServiceChanges), ScrollTime.RendersAvoided))
+		ScrollTime.RendersAvoided = 0
+
 	# Called when a row has completed one cycle of it's states and requests to change card, here the program decides what to do.
 	def requestCardChange(self, card, row):
 		# If it has cycled through all cards, cycle from start again, unless enough time has passed for a new API request.
 		if (self.x > Args.NumberOfCards or self.x >len(self.Services)-1):
 			self.x = 1 if Args.FixToArrive else 0
-			if LiveTime.TimePassed():  
-				self.Services = LiveTime.GetData()
-				print_safe("New Data Retrieved %s" % datetime.now().time())
+			if LiveTime.TimePassed() and CircuitBreaker.Ready():
+				services = Departures.update(LiveTime.GetData())
+				self.logChanges(services)
+				self.Services = services
+				if not Departures.Stale:
+					print_safe("New Data Retrieved %s" % datetime.now().time())
+			elif Departures.Stale:
+				self.Services = Departures.current()
 		
 		# If there are more rows (3) than there is services scheduled show nothing.
 		if row > len(self.Services):       
@@ -588,10 +1099,10 @@ class boardFixed():
 		if  not (Args.FixToArrive and row == 1):
 			self.x = self.x + 1
 
-	# Used to add a time delay if there was an error with the last API request (providing a back off and wait mechanism)
+	# Keeps the board waiting, without being rebuilt, until new data may be requested again and an API's circuit breaker lets a request through.
 	def is_waiting(self):
 		self.ticks += 1
-		if self.ticks > Args.RecoveryTime:
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
 			self.ticks = 0
 			return False
 		return True
@@ -625,6 +1136,10 @@ if Args.Display == 'gifanim':
 
 
 image_composition = ImageComposition(device)
+# Every count down the board can show, drawn once now rather than each time a row changes to it.
+Labels = LabelAtlas(device, [' Due'] + [' %d min' % Minutes for Minutes in range(2, 15)])
+Departures = DepartureStore()
+Countdown = CountdownScheduler()
 board = boardFixed(image_composition,Args.Delay,device)
 FontTime = ImageFont.truetype("%s/resources/time.otf" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))),16)
 device.contrast(255)
@@ -5,12 +5,23 @@
 # Python 3 Required.
 
 import argparse
+import heapq
 import inspect
 import json
 import os
+import re
+import sys
 import time
-from datetime import datetime
-from urllib.request import urlopen, Request
+import threading
+import random
+from datetime import datetime, date
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import base64
+import http.client
+from urllib.parse import urlsplit, urljoin, unquote
+from urllib.request import getproxies, proxy_bypass_environment
 
 from PIL import ImageFont, Image, ImageDraw
 from luma.core import cmdline
@@ -44,13 +55,16 @@ def check_time(value):
 ## Defines all optional paramaters
 parser = argparse.ArgumentParser(description='London Underground Live Departure Board, to run the program you will need to pass it all of the required paramters and you may wish to pass any optional paramters.')
 parser.add_argument("-t","--TimeFormat", help="Do you wish to use 24hr or 12hr time format; default is 24hr.", type=int,choices=[12,24],default=24)
+parser.add_argument("--TimeZone", help="The time zone the API gives times in and the display shows them in; default is Europe/London", type=str,default="Europe/London")
 parser.add_argument("-v","--Speed", help="What speed do you want the text to scroll at on the display; default is 3, must be greater than 0.", type=check_positive,default=3)
 parser.add_argument("-d","--Delay", help="How long the display will pause before starting the next animation; default is 30, must be greater than 0.", type=check_positive,default=30)
-parser.add_argument("-r","--RecoveryTime", help="How long the display will wait before attempting to get new data again after previously failing; default is 100, must be greater than 0.", type=check_positive,default=100)
+parser.add_argument("-r","--RecoveryTime", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, see BackoffBase and BackoffMax", type=check_positive,default=100)
+parser.add_argument("--BackoffBase", help="How long the display will wait before requesting new data from an API again after it fails, doubling each time it fails again in a row; default is 30(seconds)", type=check_positive,default=30)
+parser.add_argument("--BackoffMax", help="The longest the display will wait before requesting new data from an API again after it fails; default is 900(seconds)", type=check_positive,default=900)
 parser.add_argument("-n","--NumberOfCards", help="The maximum number of cards you will see before forcing a new data retrieval, a limit is recommend to prevent cycling through data which may become out of data or going too far into scheduled trains; default is 9, must be greater than 0.", type=check_positive,default=9)
 parser.add_argument("-y","--Rotation", help="Defines which way up the screen is rendered; default is 0", type=int,default=0,choices=[0,2])
 parser.add_argument("-l","--RequestLimit", help="Defines the minium amount of time the display must wait before making a new data request; default is 55(seconds)", type=check_positive,default=55)
-parser.add_argument("-z","--StaticUpdateLimit", help="Defines the amount of time the display will wait before updating the expected arrival time (based upon it's last known predicted arrival time); default is  15(seconds), this should be lower than your 'RequestLimit'", type=check_positive,default=15)
+parser.add_argument("-z","--StaticUpdateLimit", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, the time shown is updated whenever it changes", type=check_positive,default=15)
 parser.add_argument("-e","--EnergySaverMode", help="To save screen from burn in and prolong it's life it is recommend to have energy saving mode enabled. 'off' is default, between the hours set the screen will turn off. 'dim' will turn the screen brightness down, but not completely off. 'none' will do nothing and leave the screen on; this is not recommend, you can change your active hours instead.", type=str,choices=["none","dim","off"],default="off")
 parser.add_argument("-i","--InactiveHours", help="The period of time for which the display will go into 'Energy Saving Mode' if turned on; default is '23:00-07:00'", type=check_time,default="23:00-07:00")
 parser.add_argument("-u","--UpdateDays", help="The number of days for which the Pi will wait before rebooting and checking for a new update again during your energy saving period; default 1 day (every day check).", type=check_positive, default=1)
@@ -66,6 +80,13 @@ parser.add_argument("--Display", default="ssd1322", choices=['ssd1322','pygame',
 parser.add_argument("--max-frames", default=60,dest='maxframes', type=check_positive, help="Used only when using gifanim emulator, sets how long the gif should be.")
 parser.add_argument("--no-console-output",dest='NoConsole', action='store_true', help="Used to stop the program outputting anything to console that isn't an error message, you might want to do this if your logging the program output into a file to record crashes.")
 parser.add_argument("--filename",dest='filename', default="output.gif", help="Used mainly for development, if using a gifanim display, this can be used to set the output gif file name, this should always end in .gif.")
+parser.add_argument("--FetchMode", default='stop', choices=['stop', 'line'], help="How arrivals are requested from the API. stop- gets every arrival at the station and removes any not wanted. line- gets only the wanted lines and direction, one request per line at the same time, which is smaller at stations served by many lines; default is 'stop'.")
+parser.add_argument("--Lines", default=[], nargs='*', help="When using the 'line' fetch mode, the TfL line IDs to show, for example 'central hammersmith-city'; default is every line at the station which is not in ExcludeLines.")
+parser.add_argument("--ConnectTimeout", help="How long to wait when connecting to the API before giving up; default is 5(seconds), must be greater than 0.", type=check_positive, default=5)
+parser.add_argument("--ReadTimeout", help="How long to wait for the API to respond before giving up; default is 15(seconds), must be greater than 0.", type=check_positive, default=15)
+parser.add_argument("--Record", help="Used for development and testing, saves every response from the API into this folder so they can be played back later with '--Replay'.")
+parser.add_argument("--Replay", help="Used for development and testing, plays back the API responses saved with '--Record' in this folder instead of using the API, so no connection is needed.")
+parser.add_argument("--ReplaySpeed", type=float, default=0, help="When replaying, how many times faster than they were recorded the responses are played back, 0 plays each back as soon as it is requested; default is 0.")
 #parser.add_argument("--no-pip-update",dest='NoPipUpdate',  action='store_true', default=False, help="By default, the program will update any software dependencies/ pip libraries, this is to ensure your display still works correctly and has the required security updates. However, if you wish you can use this tag to disable pip updates and downloads. ")
 parser.add_argument("-a","--APIID", help="LEGACY - THIS IS NO LONGER USED OR NEEDED", type=str)
 
@@ -82,6 +103,265 @@ BasicFontHeight = 14
 BasicFont = ImageFont.truetype("%s/resources/lower.ttf" %(os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))) ), BasicFontHeight)
 
 
+if Args.Record and Args.Replay:
+	print("You can not have both '--Record' and '--Replay' turned on at the same time.")
+	sys.exit()
+
+###
+# Below contains the recorder, which can save every response from the API (--Record) and play them back instead of using the API (--Replay).
+###
+# Saves each API response with the time it was received, or plays them back in the same order, so the board can be run and timed without the API.
+class Recorder():
+	# Parts of a request which are secret, these are not saved and are ignored when matching requests to responses.
+	Secrets = re.compile(r"(api_token|app_id|app_key)=[^&]*")
+
+	def __init__(self, record, replay, speed):
+		self.record = record
+		self.replay = replay
+		self.speed = speed
+		self.lock = threading.Lock()
+		self.seq = 0
+		# The saved responses not yet played back, by request.
+		self.Responses = {}
+		# When the first response was played back and when it was received, used to play the rest back at the same pace.
+		self.Start = None
+		if record:
+			os.makedirs(record, exist_ok=True)
+		if replay:
+			with open("%s/index.jsonl" % replay) as file:
+				for line in file:
+					entry = json.loads(line)
+					self.Responses.setdefault(entry["key"], []).append(entry)
+
+	# Returns what a request is saved under, the URL without any secrets.
+	@staticmethod
+	def Key(url):
+		return Recorder.Secrets.sub(r"\1=", url)
+
+	# Saves a response in the record folder.
+	def save(self, key, status, headers, body):
+		with self.lock:
+			self.seq += 1
+			fileName = "%06d.bin" % self.seq
+			with open("%s/%s" % (self.record, fileName), "wb") as file:
+				file.write(body)
+			with open("%s/index.jsonl" % self.record, "a") as file:
+				file.write(json.dumps({"seq": self.seq, "time": time.time(), "key": key, "status": status, "headers": list(headers.items()), "file": fileName}) + "\n")
+
+	# Returns the next saved status, headers and body for the request. Once all of them have been played back the last one is repeated.
+	# If a replay speed is given, each is not returned until the same time has passed since the first as when recorded, divided by the speed.
+	def load(self, key):
+		with self.lock:
+			entries = self.Responses.get(key)
+			if not entries:
+				raise Exception("No recorded response for %s" % key)
+			entry = entries.pop(0) if len(entries) > 1 else entries[0]
+			if self.Start is None:
+				self.Start = (time.time(), entry["time"])
+		if self.speed > 0:
+			wait = self.Start[0] + (entry["time"] - self.Start[1]) / self.speed - time.time()
+			if wait > 0:
+				time.sleep(wait)
+
+		headers = http.client.HTTPMessage()
+		for name, value in entry["headers"]:
+			headers[name] = value
+		with open("%s/%s" % (self.replay, entry["file"]), "rb") as file:
+			return entry["status"], headers, file.read()
+
+Recordings = Recorder(Args.Record, Args.Replay, Args.ReplaySpeed)
+
+###
+# Below contains the HTTP client used for every request made to the API.
+###
+# The result of a request, with the body already read and decompressed. It can be used in the same way as the response from urlopen.
+class HttpResponse():
+	def __init__(self, status, headers, body):
+		self.status = status
+		self.headers = headers
+		self.body = body
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		return False
+
+	def read(self):
+		return self.body
+
+	def getcode(self):
+		return self.status
+
+# Keeps connections open to each website between requests, so each request does not pay for looking up the website and connecting (the TLS handshake) again.
+# Responses are requested compressed, and connecting and waiting for a response are both given a time limit so a bad connection can not hang the display.
+class HttpClient():
+	def __init__(self, connectTimeout, readTimeout):
+		self.connectTimeout = connectTimeout
+		self.readTimeout = readTimeout
+		self.lock = threading.Lock()
+		# Open connections not currently in use, by scheme and host. More than one may be open when requests are made at the same time.
+		self.idle = {}
+		# The proxies set in the environment, by scheme.
+		self.proxies = getproxies()
+
+	# Returns the proxy to use for the host from the environment (HTTPS_PROXY, HTTP_PROXY and NO_PROXY) as urlopen does, or None to connect directly.
+	def proxy(self, scheme, host):
+		proxy = self.proxies.get(scheme)
+		if not proxy or proxy_bypass_environment(host, self.proxies):
+			return None
+		return urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+	# Returns the headers to log in to the proxy with, if it needs it.
+	@staticmethod
+	def ProxyHeaders(proxy):
+		if not proxy.username:
+			return {}
+		login = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+		return {"Proxy-Authorization": "Basic " + base64.b64encode(login.encode()).decode()}
+
+	# Returns an open connection to the host and whether it has been used before.
+	def connection(self, scheme, host):
+		with self.lock:
+			if self.idle.get((scheme, host)):
+				return self.idle[(scheme, host)].pop(), True
+		proxy = self.proxy(scheme, host)
+		if proxy is not None and scheme == "https":
+			# Secure requests are tunnelled through the proxy to the host.
+			conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+			conn.set_tunnel(host, headers=self.ProxyHeaders(proxy))
+		elif proxy is not None:
+			conn = http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+		elif scheme == "https":
+			conn = http.client.HTTPSConnection(host, timeout=self.connectTimeout)
+		else:
+			conn = http.client.HTTPConnection(host, timeout=self.connectTimeout)
+		conn.connect()
+		conn.sock.settimeout(self.readTimeout)
+		return conn, False
+
+	def release(self, scheme, host, conn):
+		with self.lock:
+			self.idle.setdefault((scheme, host), []).append(conn)
+
+	# Makes a GET request, following any redirects, and returns a HttpResponse.
+	def request(self, url, headers={}, redirects=3):
+		parts = urlsplit(url)
+		path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+		sendHeaders = {"Accept-Encoding": "gzip", "User-Agent": "Mozilla/5.0"}
+		sendHeaders.update(headers)
+		proxy = self.proxy(parts.scheme, parts.netloc)
+		if proxy is not None and parts.scheme == "http":
+			# Plain requests through a proxy ask it for the whole URL.
+			path = url
+			sendHeaders.update(self.ProxyHeaders(proxy))
+
+		for attempt in range(2):
+			conn, reused = self.connection(parts.scheme, parts.netloc)
+			try:
+				conn.request("GET", path, headers=sendHeaders)
+				response = conn.getresponse()
+				body = response.read()
+				break
+			except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+				conn.close()
+				# The website may have closed a connection which had been left open, if so try again once with a new one.
+				if not reused or attempt == 1:
+					raise
+			except Exception:
+				conn.close()
+				raise
+
+		if response.will_close:
+			conn.close()
+		else:
+			self.release(parts.scheme, parts.netloc, conn)
+
+		if response.getheader("Content-Encoding", "") == "gzip":
+			body = gzip.decompress(body)
+		if response.status in (301, 302, 303, 307, 308) and response.getheader("Location") and redirects > 0:
+			return self.request(urljoin(url, response.getheader("Location")), headers, redirects - 1)
+		return HttpResponse(response.status, response.msg, body)
+
+	# Makes a GET request and returns a HttpResponse, saving the response if recording or playing one back if replaying. Like urlopen an error is raised if the request failed.
+	def get(self, url, headers={}):
+		key = Recorder.Key(url)
+		if Args.Replay:
+			response = HttpResponse(*Recordings.load(key))
+		else:
+			response = self.request(url, headers)
+			if Args.Record:
+				Recordings.save(key, response.status, response.headers, response.body)
+		if response.status >= 400:
+			raise Exception("HTTP Error %d" % response.status)
+		return response
+
+Http = HttpClient(Args.ConnectTimeout, Args.ReadTimeout)
+
+
+# Remembers the last response from each URL, so it is not downloaded and decoded again if it has not changed.
+# While the API says a response is still fresh (Cache-Control max-age) it is reused without asking, after that the API is asked only for a newer version (ETag/ Last-Modified).
+class ConditionalCache():
+	def __init__(self):
+		self.lock = threading.Lock()
+		# The decoded response, how to ask if it has changed and when it stops being fresh, by URL.
+		self.Responses = {}
+		self.fresh = 0
+		self.notModified = 0
+		self.downloaded = 0
+
+	# Returns how many seconds a response can be reused for without asking the API again.
+	@staticmethod
+	def MaxAge(headers):
+		cacheControl = headers.get("Cache-Control", "")
+		if "no-cache" in cacheControl or "no-store" in cacheControl:
+			return 0
+		maxAge = re.search(r"max-age=(\d+)", cacheControl)
+		if maxAge is None:
+			return 0
+		try:
+			age = int(headers.get("Age", 0))
+		except ValueError:
+			age = 0
+		return max(0, int(maxAge.group(1)) - age)
+
+	# Returns the decoded JSON response from the URL, from the last response if it has not changed.
+	def get(self, url):
+		with self.lock:
+			entry = self.Responses.get(url)
+		if entry is not None and time.time() < entry["expires"]:
+			with self.lock:
+				self.fresh += 1
+			return entry["data"]
+
+		headers = {}
+		if entry is not None:
+			if entry["etag"]:
+				headers["If-None-Match"] = entry["etag"]
+			if entry["lastModified"]:
+				headers["If-Modified-Since"] = entry["lastModified"]
+
+		with Http.get(url, headers) as conn:
+			status, responseHeaders, body = conn.getcode(), conn.headers, conn.read()
+		if status == 304 and entry is None:
+			# Nothing is kept to reuse, such as after the cache was reset or when replaying, so ask again for the whole response.
+			with Http.get(url) as conn:
+				status, responseHeaders, body = conn.getcode(), conn.headers, conn.read()
+			if status == 304:
+				raise Exception("Not modified response for %s without a response to reuse" % url)
+
+		notModified = status == 304
+		data = entry["data"] if notModified else json.loads(body)
+		with self.lock:
+			if notModified:
+				self.notModified += 1
+			else:
+				self.downloaded += 1
+			self.Responses[url] = {"data": data, "etag": responseHeaders.get("ETag") or (entry and entry["etag"]), "lastModified": responseHeaders.get("Last-Modified") or (entry and entry["lastModified"]), "expires": time.time() + self.MaxAge(responseHeaders)}
+		return data
+
+Responses = ConditionalCache()
+
 ###
 # Below contains the class which is used to reperesent one instance of a service record. It is also responsible for getting the information from the Transport for London API.
 ###
@@ -89,77 +369,195 @@ BasicFont = ImageFont.truetype("%s/resources/lower.ttf" %(os.path.dirname(os.pat
 class LiveTimeStud():
 	def __init__(self):
 		self.Destination = " "
+		self.Towards = " "
 		self.DisplayTime = " "
 		self.ExptArrival = " "
 		self.Via = " "
 		self.ID =  "0"
-	
-	def TimePassedStatic(self):
-		return False
 		
 	
+# The times of a service, converted once when the data is retrieved instead of every time they are shown. Every time is in seconds since the epoch.
+class Departure():
+	__slots__ = ("Scheduled", "Expected")
+	# The time zone the API gives local times in. Its offset from UTC and when its last midnight was are worked out by Refresh().
+	Zone = ZoneInfo(Args.TimeZone)
+	Offset = 0
+	Midnight = 0
+	# The first day of the epoch, as counted by date.toordinal().
+	Epoch = date(1970, 1, 1).toordinal()
+
+	def __init__(self, Scheduled, Expected):
+		self.Scheduled = Scheduled
+		# The predicted time, None if it is not known.
+		self.Expected = Expected
+
+	# Returns the predicted time if known, else the time tabled time.
+	def Best(self):
+		return self.Scheduled if self.Expected is None else self.Expected
+
+	# Returns how many minutes until the service is due, negative once it should have already gone.
+	def MinutesUntil(self):
+		return (self.Best() - time.time()) / 60
+
+	# Returns when a count down to the time next changes, in seconds since the epoch: when it comes within 'Limit' minutes, then as each
+	# whole minute passes until it is within 'Due' minutes, where it stays the same. Returns None once it will not change again.
+	def NextChange(self, Due, Limit):
+		Seconds = self.Best()
+		left = Seconds - time.time()
+		if left <= Due * 60:
+			return None
+		if left >= Limit * 60:
+			return Seconds - Limit * 60
+		return Seconds - int(left // 60) * 60
+
+	# Works out the time zone's offset from UTC, and when its last midnight was, once each time new data is retrieved instead of for every time converted.
+	@staticmethod
+	def Refresh():
+		now = int(time.time())
+		Departure.Offset = int(datetime.fromtimestamp(now, Departure.Zone).utcoffset().total_seconds())
+		Departure.Midnight = (now + Departure.Offset) // 86400 * 86400 - Departure.Offset
+
+	# Converts a date and time ("YYYY-MM-DDTHH:MM:SS", anything after is ignored) to seconds since the epoch as if it were UTC.
+	# The APIs always give it in this one format, so each field is read from where it always is, which is far quicker than strptime.
+	@staticmethod
+	def Seconds(Text):
+		return (date(int(Text[0:4]), int(Text[5:7]), int(Text[8:10])).toordinal() - Departure.Epoch) * 86400 + int(Text[11:13]) * 3600 + int(Text[14:16]) * 60 + int(Text[17:19])
+
+	# Converts a UTC date and time ("YYYY-MM-DDTHH:MM:SSZ") to seconds since the epoch.
+	@staticmethod
+	def FromUTC(Text):
+		return Departure.Seconds(Text)
+
+	# Returns a time in seconds since the epoch as shown on the display, in the time zone.
+	@staticmethod
+	def Clock(Seconds):
+		return time.strftime("%H:%M" if (Args.TimeFormat==24) else "%I:%M", time.gmtime(Seconds + Departure.Offset))
+
+
 # Used to get live data from the TfL API and represent a specific services and it's details.
 class LiveTime(object):
 	# The last time an API call was made to get new data.
 	LastUpdate = datetime.now()
+	# How a service can have changed from one lot of data to the next, as far as what is shown on the display.
+	ServiceChanges = ["unchanged", "time-changed", "index-changed", "new", "departed"]
+	# The IDs of the lines at the station, found once when using the 'line' fetch mode.
+	LineIDs = None
 	
 	# * Change this method to implement your own API *
 	def __init__(self, Data):
 		self.Destination =  str(Data['towards'])
-		self.ExptArrival = self.convertUTCtoLocal(str(Data['expectedArrival']))
+		# The destination without the index, which is added in front of it once the services are in order.
+		self.Towards = self.Destination
+		# Only the predicted time is given. It is converted once, so it is not converted again each time it is shown.
+		self.Times = Departure(None, Departure.FromUTC(str(Data['expectedArrival'])))
 		self.DisplayTime = self.GetDisplayTime()
 		self.ID =  str(Data['id'])
 		self.Via = "This is a %s line train, to %s" % (str(Data['lineName']), str(Data['destinationName'] if 'destinationName' in Data else str(Data['towards'])))
 
-	# The API gives time formats in UTC format, but during BST all times are one hour out. This corrects the issue.
-	def convertUTCtoLocal(self, dateTimeInput):
-		datetimeTemp = datetime.strptime(dateTimeInput, '%Y-%m-%dT%H:%M:%SZ')
-		datetimeTemp = datetimeTemp + (datetime.now() - datetime.utcnow())
-		return datetimeTemp.strftime('%Y-%m-%dT%H:%M:%S')
-
 
 	#Returns the value to display the time on the board.
 	def GetDisplayTime(self):
-		# Last time the display screen was updated to reflect the new time of arrival.
-		self.LastStaticUpdate = datetime.now()
-		if self.TimeInMin() <= 1:
+		Diff = self.TimeInMin()
+		if Diff <= 1:
 			return ' Due'
-		elif self.TimeInMin() >=15 :
-			return ' ' + datetime.strptime(self.ExptArrival, '%Y-%m-%dT%H:%M:%S').strftime("%H:%M" if (Args.TimeFormat==24) else  "%I:%M")
+		elif Diff >=15 :
+			return ' ' + Departure.Clock(self.Times.Expected)
 		else:
-			return  ' %d mins' % self.TimeInMin()	
+			return  ' %d mins' % Diff
 
 	def TimeInMin(self):
-		return (datetime.strptime(self.ExptArrival, '%Y-%m-%dT%H:%M:%S') - datetime.now()).total_seconds() / 60
+		return self.Times.MinutesUntil()
+
+	# Compares a service with the same service from newer data, returning what has changed of what is shown on the display.
+	# Any change other than the time or index means the whole card has to be drawn again, so is treated as a new service.
+	@staticmethod
+	def ClassifyService(old, new):
+		if old is None:
+			return "new"
+		if new is None:
+			return "departed"
+		if (old.Towards, old.Via) != (new.Towards, new.Via):
+			return "new"
+		# The index is part of the destination text, so a service which has only moved in the list is drawn again in place.
+		if old.Destination != new.Destination:
+			return "index-changed"
+		if old.DisplayTime != new.DisplayTime:
+			return "time-changed"
+		return "unchanged"
+
+	# Compares the last and newest services, returning how each has changed by ID, including those no longer given as departed.
+	@staticmethod
+	def DiffServices(old, new):
+		previous = {service.ID: service for service in old}
+		changes = {service.ID: LiveTime.ClassifyService(previous.get(service.ID), service) for service in new}
+		for ID in previous:
+			if ID not in changes:
+				changes[ID] = "departed"
+		return changes
+
+	# Returns true if the train is expected to have already arrived.
+	def HasDeparted(self):
+		return self.TimeInMin() < 0
 
 	# Returns true or false dependent upon if the last time an API data call was made was over the request limit; to prevent spamming the API feed.
 	@staticmethod
 	def TimePassed():
 		return (datetime.now() - LiveTime.LastUpdate).total_seconds() > Args.RequestLimit
 
-	# Return true or false dependent upon if the last time the display was updated was over the static update limit. This prevents updating the display to frequently to increase performance.
-	def TimePassedStatic(self):
-		return ("min" in self.DisplayTime) and (datetime.now() - self.LastStaticUpdate).total_seconds() > Args.StaticUpdateLimit 
+	# Returns when the time shown for the service next changes, in seconds since the epoch, or None if it will not change again.
+	def NextLabelChange(self):
+		return self.Times.NextChange(1, 15)
+
+	# Returns the IDs of the lines to request arrivals for, either those given or every line at the station which is not excluded.
+	@staticmethod
+	def GetLineIDs():
+		if Args.Lines:
+			return Args.Lines
+		if LiveTime.LineIDs is None:
+			stopPoint = Responses.get("https://api.tfl.gov.uk/StopPoint/%s?app_id=%s&app_key=%s" % (Args.StationID, Args.APIKey, Args.APIKey))
+			LiveTime.LineIDs = [str(line['id']) for line in stopPoint['lines'] if str(line['name']) not in Args.ExcludeLines]
+		return LiveTime.LineIDs
+
+	# Gets the arrivals of each wanted line in the wanted direction at the same time, returning a list of arrivals for each line sorted by arrival time.
+	@staticmethod
+	def GetLineArrivals():
+		direction = "all" if Args.Direction == "both" else Args.Direction
+		urls = ["https://api.tfl.gov.uk/Line/%s/Arrivals/%s?direction=%s&app_id=%s&app_key=%s" % (lineID, Args.StationID, direction, Args.APIKey, Args.APIKey) for lineID in LiveTime.GetLineIDs()]
+		if not urls:
+			return []
+		with ThreadPoolExecutor(max_workers=min(4, len(urls))) as pool:
+			lines = list(pool.map(Responses.get, urls))
+		# The expected arrival times are all in UTC in the same format, so they sort in time order as text.
+		return [sorted(line, key=lambda service: service['expectedArrival']) for line in lines]
 
 	# Calls the API and gets the data from it, returning a list of LiveTime objects to be used in the program.
 	# * Change this method to implement your own API *
 	@staticmethod
 	def GetData():
 		LiveTime.LastUpdate = datetime.now()
+		Departure.Refresh()
 		services = []
 
 		url = "https://api.tfl.gov.uk/StopPoint/%s/Arrivals?app_id=%s&app_key=%s" % (Args.StationID, Args.APIKey, Args.APIKey)
-		req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
+		breaker = CircuitBreaker.For("TfL")
+		if not breaker.allow():
+			return None
 		try:
-			with urlopen(req) as conn:
-				tempServices = json.loads(conn.read())
+			# The arrival times are given as times of day, so services made from an unchanged response are still correct.
+			if Args.FetchMode == "line":
+				# Only the wanted lines and direction were requested, so the already sorted lines just need merging.
+				for service in heapq.merge(*LiveTime.GetLineArrivals(), key=lambda service: service['expectedArrival']):
+					services.append(LiveTime(service))
+			else:
+				tempServices = Responses.get(url)
 				for service in tempServices:
 					# If not in excluded services list, convert custom API object to LiveTime object and add to list.
 					if str(service['lineName']) not in Args.ExcludeLines:
 						if Args.Direction == 'both' or ("direction" in service and Args.Direction == str(service["direction"])):
 							services.append(LiveTime(service))
 
-			services.sort(key=lambda x: x.TimeInMin())
+				services.sort(key=lambda x: x.Times.Expected)
+			print_safe("Arrivals: %d refreshes without a download (%d still fresh, %d not modified), %d downloaded" % (Responses.fresh + Responses.notModified, Responses.fresh, Responses.notModified, Responses.downloaded))
 
 			if Args.ShowIndex:
 				x = 1
@@ -170,11 +568,13 @@ class LiveTime(object):
 						service.Destination = str(x) + "." + service.Destination
 					x = x + 1
 	
+			breaker.success()
 			return services
 		except Exception as e:
+			breaker.failure()
 			print("GetData() ERROR")
 			print(str(e))
-			return []
+			return None
 
 
 
@@ -194,6 +594,26 @@ class TextImage():
 		self.height = 5 + BasicFontHeight
 		del draw
 
+# Keeps the images of the times shown on the board, so each is only drawn once rather than every time it changes.
+# Every count down label is drawn when the display starts, any other (such as 'HH:MM') the first time it is shown.
+class LabelAtlas():
+	# How many labels drawn when first shown are kept before they are all forgotten, so a board left running does not keep every time of day.
+	Limit = 256
+
+	def __init__(self, device, labels):
+		self.device = device
+		self.Labels = dict((label, TextImage(device, label)) for label in labels)
+		self.Shown = {}
+
+	# Returns the image of the label, only drawing it if it has not been already.
+	def get(self, label):
+		image = self.Labels.get(label) or self.Shown.get(label)
+		if image is None:
+			if len(self.Shown) >= self.Limit:
+				self.Shown.clear()
+			image = self.Shown[label] = TextImage(self.device, label)
+		return image
+
 # Used to create the destination and via board.
 class TextImageComplex():
 	def __init__(self, device, destination, via, startOffset):
@@ -211,14 +631,15 @@ class StaticTextImage():
 	def __init__(self, device, service, previous_service):			
 		self.image = Image.new(device.mode, (device.width, 32))
 		draw = ImageDraw.Draw(self.image)
-		displayTimeTempPrevious = TextImage(device, previous_service.DisplayTime)
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTempPrevious = Labels.get(previous_service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
+		# The times are copied from the label atlas rather than drawn, before the rest of the text is drawn over them.
+		self.image.paste(displayTimeTemp.image, (device.width - displayTimeTemp.width, 16))
+		self.image.paste(displayTimeTempPrevious.image, (device.width - displayTimeTempPrevious.width, 0))
 
-		draw.text((device.width - displayTimeTemp.width, 16), service.DisplayTime, font=BasicFont, fill="white")
 		draw.text((0,displayTimeTemp.height), service.Destination, font=BasicFont, fill="white")	
 
 		draw.text((0,0), previous_service.Destination, font=BasicFont, fill="white")	
-		draw.text((device.width - displayTimeTempPrevious.width, 0), previous_service.DisplayTime, font=BasicFont, fill="white")
 	
 		self.width = device.width 
 		self.height = 32
@@ -293,6 +714,9 @@ class ScrollTime():
 	TRAIN_APPROACHING = 10
 
 	STUD = -1
+
+	# The number of images which have not needed drawing again since it was last reset, as what they show had not changed.
+	RendersAvoided = 0
 	
 	Alternator = 0
 
@@ -326,10 +750,13 @@ class ScrollTime():
 		self.synchroniser = synchroniser
 		self.render()
 		self.synchroniser.ready(self)
+		# Set by the countdown scheduler when the time shown is due to change.
+		self.LabelDue = False
+		Countdown.schedule(self)
 
 	# Generates all the Images (Text boxes) to be drawn on the display.
 	def generateCard(self,service):
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
 		IDestinationTemp  = TextImageComplex(device, service.Destination,service.Via, displayTimeTemp.width)
 
 		self.IDestination =  ComposableImage(IDestinationTemp.image.crop((0,0,IDestinationTemp.width + 10,16)), position=(0, 16 * self.position))
@@ -338,14 +765,24 @@ class ScrollTime():
 		
 	# Called when you have new/updated information from an API call and want to update the objects predicted arrival time.
 	def updateCard(self, newService, device):
+		change = LiveTime.ClassifyService(self.CurrentService, newService)
+		if change == "new":
+			self.changeCard(newService, device)
+			return
 		self.state = self.SCROLL_DECIDER
 		self.synchroniser.ready(self)
+		self.CurrentService = newService
+		Countdown.schedule(self)
+		# Only draw the time again if it has changed.
+		if change == "unchanged":
+			ScrollTime.RendersAvoided += 2
+			return
 		#Need to regenerate both because the width of the time displayed can shrink. 
 		self.image_composition.remove_image(self.IDestination)
 		self.image_composition.remove_image(self.IDisplayTime)
 		self.image_composition.refresh()
 
-		displayTimeTemp = TextImage(device, newService.DisplayTime)
+		displayTimeTemp = Labels.get(newService.DisplayTime)
 		self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))
 
 		IDestinationTemp  = TextImageComplex(device, newService.Destination,newService.Via, displayTimeTemp.width)
@@ -381,6 +818,7 @@ class ScrollTime():
 
 		self.generateCard(newService)
 		self.CurrentService = newService
+		Countdown.schedule(self)
 		self.max_pos = self.IDestination.width
 
 		self.state = self.WAIT_STUD if (newService.ID == "0") else self.WAIT_OPENING
@@ -402,14 +840,21 @@ class ScrollTime():
 
 	# Called upon each time you want to get the next frame for the display.
 	def tick(self):
-		#Update X min till arrival.
-		if self.CurrentService.TimePassedStatic() and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
-			self.image_composition.remove_image(self.IDisplayTime)
-			self.CurrentService.DisplayTime = self.CurrentService.GetDisplayTime()
-			displayTimeTemp = TextImage(device, self.CurrentService.DisplayTime)
-			self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
-			self.image_composition.add_image(self.IDisplayTime)
-			self.image_composition.refresh()
+		#Update X min till arrival, once the countdown scheduler has woken the row as it is due to change.
+		if self.LabelDue and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
+			self.LabelDue = False
+			DisplayTime = self.CurrentService.GetDisplayTime()
+			# The time shown only needs drawing again if it has changed.
+			if DisplayTime == self.CurrentService.DisplayTime:
+				ScrollTime.RendersAvoided += 1
+			else:
+				self.CurrentService.DisplayTime = DisplayTime
+				self.image_composition.remove_image(self.IDisplayTime)
+				displayTimeTemp = Labels.get(self.CurrentService.DisplayTime)
+				self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
+				self.image_composition.add_image(self.IDisplayTime)
+				self.image_composition.refresh()
+			Countdown.schedule(self)
 
 
 		if self.state == self.WAIT_OPENING:
@@ -564,13 +1009,189 @@ class ScrollTime():
 			return False
 		return True
 
+###
+## Circuit Breaker
+## Stops requesting new data from an API endpoint which keeps failing, waiting longer after each failure before trying it again.
+###
+class CircuitBreaker():
+	# Every endpoint's circuit breaker, by name.
+	Breakers = {}
+
+	def __init__(self, name):
+		self.name = name
+		self.lock = threading.Lock()
+		# closed- requests are made as normal. open- no requests are made until OpenUntil. half-open- one trial request is being made.
+		self.State = "closed"
+		self.failures = 0
+		self.OpenUntil = 0
+
+	# Returns the circuit breaker for the endpoint, creating it the first time.
+	@staticmethod
+	def For(name):
+		if name not in CircuitBreaker.Breakers:
+			CircuitBreaker.Breakers[name] = CircuitBreaker(name)
+		return CircuitBreaker.Breakers[name]
+
+	# Returns true if any endpoint may be requested now, so there is a point in asking for new data.
+	@staticmethod
+	def Ready():
+		now = time.time()
+		return not CircuitBreaker.Breakers or any(breaker.State == "closed" or (breaker.State == "open" and now >= breaker.OpenUntil) for breaker in CircuitBreaker.Breakers.values())
+
+	# Returns true if a request may be made to the endpoint now. Once the wait is over a single trial request is let through.
+	def allow(self):
+		with self.lock:
+			if self.State == "closed":
+				return True
+			if self.State == "open" and time.time() >= self.OpenUntil:
+				self.setState("half-open", "trying again")
+				return True
+			return False
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+			if self.State != "closed":
+				self.setState("closed", "working again")
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			# The wait doubles with each failure in a row, up to the maximum. Half of it is random so many displays do not all try again at once.
+			backoff = min(Args.BackoffMax, Args.BackoffBase * 2 ** min(self.failures - 1, 20))
+			wait = backoff / 2 + random.uniform(0, backoff / 2)
+			self.OpenUntil = time.time() + wait
+			self.setState("open", "%d failures in a row, trying again in %ds" % (self.failures, wait))
+
+	def setState(self, state, reason):
+		self.State = state
+		print_safe("Circuit breaker for %s is %s - %s" % (self.name, state, reason))
+
+
+###
+## Departure Store
+## Keeps the last services retrieved, so the board carries on showing them while new data cannot be retrieved instead of showing "No Services".
+###
+class DepartureStore():
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.Services = []
+		# True when new data could not be retrieved, so the services are from an earlier request.
+		self.Stale = False
+		self.Updated = datetime.now()
+
+	# Keeps newly retrieved services, or if they could not be retrieved (None) marks the last ones as stale. Returns the services to show.
+	def update(self, services):
+		with self.lock:
+			if services is not None:
+				if self.Stale:
+					print_safe("New data retrieved, no longer showing the services from %s" % self.Updated.time())
+				self.Services = services
+				self.Stale = False
+				self.Updated = datetime.now()
+			elif self.Services and not self.Stale:
+				print_safe("Unable to get new data, showing the services from %s until it can be" % self.Updated.time())
+				self.Stale = True
+			return self.prune()
+
+	# Returns the services to show, dropping any which have departed since they were retrieved if they are stale.
+	def current(self):
+		with self.lock:
+			return self.prune()
+
+	# Only stale services are pruned. Fresh data is shown as the API gives it, as a service it still lists has not gone yet.
+	def prune(self):
+		if self.Stale:
+			self.Services = [service for service in self.Services if not service.HasDeparted()]
+		return self.Services
+
+
+###
+## Data Refresher
+## Gets new data in the background, so the display keeps animating while it waits for the API.
+###
+class DataRefresher():
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.wanted = threading.Event()
+		# Set each time a request has finished.
+		self.done = threading.Event()
+		self.Services = None
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	# Asks for new data to be retrieved, if it is not already being retrieved.
+	def request(self):
+		self.wanted.set()
+
+	# Asks for new data and waits until it has been retrieved, returning it. Only used before the board is first drawn, as there is nothing to show until then.
+	def fetch(self):
+		self.done.clear()
+		self.request()
+		self.done.wait()
+		return self.collect()
+
+	# Returns the newest finished list of services since it was last collected, or None if there is not one yet.
+	def collect(self):
+		with self.lock:
+			services = self.Services
+			self.Services = None
+		return services
+
+	def run(self):
+		while True:
+			self.wanted.wait()
+			self.wanted.clear()
+			services = Departures.update(LiveTime.GetData())
+			with self.lock:
+				self.Services = services
+			self.done.set()
+
+
+###
+## Countdown Scheduler
+## Works out when the time shown on each row will next change, so rows are only woken to update it then instead of checking every frame.
+###
+class CountdownScheduler():
+	# How long after the time shown is due to change to wake the row, as each time is still shown up to and including that moment.
+	Margin = 0.05
+
+	def __init__(self):
+		# The rows to wake, as (time to wake, order added, row, service it was showing).
+		self.heap = []
+		self.added = 0
+
+	# Schedules the row to be woken when the time shown for its service next changes.
+	def schedule(self, row):
+		service = row.CurrentService
+		if service.ID == "0":
+			return
+		# The time shown may already be out of date, if the data was retrieved a while before the row came to show it.
+		when = time.time() if service.GetDisplayTime() != service.DisplayTime else service.NextLabelChange()
+		if when is not None:
+			self.added += 1
+			heapq.heappush(self.heap, (when + self.Margin, self.added, row, service))
+
+	# Called every frame, wakes every row whose time shown is due to change. Otherwise only the soonest is looked at.
+	def tick(self):
+		now = time.time()
+		while self.heap and self.heap[0][0] <= now:
+			when, added, row, service = heapq.heappop(self.heap)
+			# A row which has moved on to another service has already been scheduled again for it.
+			if row.CurrentService is service:
+				row.LabelDue = True
+
+
 ###
 ## Board Controller
 ## Defines the board which controls what each off the rows in the display will show at any time.
 ###
 class boardFixed():
 	def __init__(self, image_composition, scroll_delay, device):
-		self.Services = LiveTime.GetData()   
+		# Every request is made by the refresher, so the board is built from the services it last retrieved. New data is asked for if it is due.
+		self.Services = Departures.current()
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
+			Refresher.request()
 		self.synchroniser = Synchroniser()
 		self.scroll_delay = scroll_delay
 		self.image_composition = image_composition
@@ -597,13 +1218,16 @@ class boardFixed():
 
 	# Called upon every time a new frame is needed.
 	def tick(self):
+		Countdown.tick()
 		#If no data can be found.
 		if len(self.Services) == 0:
 			if self.ticks == 0:
 				self.image_composition.add_image(self.NoServices)
 
-			#Wait a period of time then try getting new data again.
+			#Wait a period of time then ask for new data again in the background, building the board again once it has been retrieved.
 			if not self.is_waiting():
+				Refresher.request()
+			if Refresher.collect() is not None:
 				self.top.delete()
 				del self.top
 				self.middel.delete()
@@ -618,14 +1242,30 @@ class boardFixed():
 			self.middel.tick()
 			self.bottom.tick()
 	
+	# Logs how the services have changed since data was last retrieved, and how many images have not needed drawing again since.
+	def logChanges(self, services):
+		changes = list(LiveTime.DiffServices(self.Services, services).values())
+		print_safe("Services: %s - %d re-renders avoided since the last refresh" % (", ".join("%d %s" % (changes.count(change), change) for change in LiveTime.ServiceChanges), ScrollTime.RendersAvoided))
+		ScrollTime.RendersAvoided = 0
+
 	# Called when a row has completed one cycle of it's states and requests to change card, here the program decides what to do.
 	def requestCardChange(self, card, row):
-		# If it has cycled through all cards, cycle from start again, unless enough time has passed for a new API request.
+		# Ask for new data in the background once enough time has passed, so it is ready by the end of the cycle.
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
+			Refresher.request()
+
+		# If it has cycled through all cards, cycle from start again, using any new data which has been retrieved.
 		if (self.x > Args.NumberOfCards or self.x >len(self.Services)-1):
 			self.x = 1 if Args.FixToArrive else 0
-			if LiveTime.TimePassed():  
-				self.Services = LiveTime.GetData()
-				print_safe("New Data Retrieved %s" % datetime.now().time())
+			# Swap in the newest data once it has been retrieved in the background.
+			services = Refresher.collect()
+			if services is not None:
+				self.logChanges(services)
+				self.Services = services
+				if not Departures.Stale:
+					print_safe("New Data Retrieved %s" % datetime.now().time())
+			elif Departures.Stale:
+				self.Services = Departures.current()
 		
 		# If there are more rows (3) than there is services scheduled show nothing.
 		if row > len(self.Services):       
@@ -659,10 +1299,10 @@ class boardFixed():
 		if  not (Args.FixToArrive and row == 1):
 			self.x = self.x + 1
 
-	# Used to add a time delay if there was an error with the last API request (providing a back off and wait mechanism)
+	# Keeps the board waiting, without being rebuilt, until new data may be requested again and an API's circuit breaker lets a request through.
 	def is_waiting(self):
 		self.ticks += 1
-		if self.ticks > Args.RecoveryTime:
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
 			self.ticks = 0
 			return False
 		return True
@@ -694,6 +1334,13 @@ if Args.Display == 'gifanim':
 	device._max_frames = int(Args.maxframes)
 
 image_composition = ImageComposition(device)
+# Every count down the board can show, drawn once now rather than each time a row changes to it.
+Labels = LabelAtlas(device, [' Due'] + [' %d mins' % Minutes for Minutes in range(1, 15)])
+Departures = DepartureStore()
+Countdown = CountdownScheduler()
+Refresher = DataRefresher()
+# The first data is waited for, as there is nothing to show until it arrives.
+Refresher.fetch()
 board = boardFixed(image_composition,Args.Delay,device)
 FontTime = ImageFont.truetype("%s/resources/time.otf" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))),16)
 device.contrast(255)
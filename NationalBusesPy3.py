@@ -5,15 +5,25 @@
 # Python 3 Required.
 
 import time
+import threading
+import random
 import inspect,os
 import sys
 import json
+import re
 import argparse
-from urllib.request import urlopen
+import heapq
+import gzip
+import base64
+import http.client
+from urllib.parse import urlsplit, urljoin, unquote
+from urllib.request import getproxies, proxy_bypass_environment
+from concurrent.futures import ThreadPoolExecutor
 from PIL import ImageFont, Image, ImageDraw
 from luma.core.render import canvas
 from luma.core import cmdline
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from luma.core.image_composition import ImageComposition, ComposableImage
 
 ###
@@ -42,13 +52,16 @@ def check_time(value):
 ## Defines all optional paramaters
 parser = argparse.ArgumentParser(description='National Buses Live Departure Board, to run the program you will need to pass it all of the required paramters and you may wish to pass any optional paramters.')
 parser.add_argument("-t","--TimeFormat", help="Do you wish to use 24hr or 12hr time format; default is 24hr.", type=int,choices=[12,24],default=24)
+parser.add_argument("--TimeZone", help="The time zone the API gives times in and the display shows them in; default is Europe/London", type=str,default="Europe/London")
 parser.add_argument("-v","--Speed", help="What speed do you want the text to scroll at on the display; default is 3, must be greater than 0.", type=check_positive,default=3)
 parser.add_argument("-d","--Delay", help="How long the display will pause before starting the next animation; default is 30, must be greater than 0.", type=check_positive,default=30)
-parser.add_argument("-r","--RecoveryTime", help="How long the display will wait before attempting to get new data again after previously failing; default is 100, must be greater than 0.", type=check_positive,default=100)
+parser.add_argument("-r","--RecoveryTime", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, see BackoffBase and BackoffMax", type=check_positive,default=100)
+parser.add_argument("--BackoffBase", help="How long the display will wait before requesting new data from an API again after it fails, doubling each time it fails again in a row; default is 30(seconds)", type=check_positive,default=30)
+parser.add_argument("--BackoffMax", help="The longest the display will wait before requesting new data from an API again after it fails; default is 900(seconds)", type=check_positive,default=900)
 parser.add_argument("-n","--NumberOfCards", help="The maximum number of cards you will see before forcing a new data retrieval, a limit is recommend to prevent cycling through data which may become out of data or going too far into scheduled buses; default is 9, must be greater than 0.", type=check_positive,default=9)
 parser.add_argument("-y","--Rotation", help="Defines which way up the screen is rendered; default is 0", type=int,default=0,choices=[0,2])
 parser.add_argument("-l","--RequestLimit", help="Defines the minium amount of time the display must wait before making a new data request; default is 75(seconds)", type=check_positive,default=75)
-parser.add_argument("-z","--StaticUpdateLimit", help="Defines the amount of time the display will wait before updating the expected arrival time (based upon it's last known predicted arrival time); default is  15(seconds), this should be lower than your 'RequestLimit'", type=check_positive,default=15)
+parser.add_argument("-z","--StaticUpdateLimit", help="LEGACY - THIS IS NO LONGER USED OR NEEDED, the time shown is updated whenever it changes", type=check_positive,default=15)
 parser.add_argument("-e","--EnergySaverMode", help="To save screen from burn in and prolong it's life it is recommend to have energy saving mode enabled. 'off' is default, between the hours set the screen will turn off. 'dim' will turn the screen brightness down, but not completely off. 'none' will do nothing and leave the screen on; this is not recommend, you can change your active hours instead.", type=str,choices=["none","dim","off"],default="off")
 parser.add_argument("-i","--InactiveHours", help="The period of time for which the display will go into 'Energy Saving Mode' if turned on; default is '23:00-07:00'", type=check_time,default="23:00-07:00")
 parser.add_argument("-u","--UpdateDays", help="The number of days for which the Pi will wait before rebooting and checking for a new update again during your energy saving period; default 1 day (every day check).", type=check_positive, default=1)
@@ -68,6 +81,17 @@ parser.add_argument("--Display", default="ssd1322", choices=['ssd1322','pygame',
 parser.add_argument("--max-frames", default=60,dest='maxframes', type=check_positive, help="Used only when using gifanim emulator, sets how long the gif should be.")
 parser.add_argument("--no-console-output",dest='NoConsole', action='store_true', help="Used to stop the program outputting anything to console that isn't an error message, you might want to do this if your logging the program output into a file to record crashes.")
 parser.add_argument("--filename",dest='filename', default="output.gif", help="Used mainly for development, if using a gifanim display, this can be used to set the output gif file name, this should always end in .gif.")
+parser.add_argument("--ConnectTimeout", help="How long to wait when connecting to the API before giving up; default is 5(seconds), must be greater than 0.", type=check_positive, default=5)
+parser.add_argument("--ReadTimeout", help="How long to wait for the API to respond before giving up; default is 15(seconds), must be greater than 0.", type=check_positive, default=15)
+parser.add_argument("--Record", help="Used for development and testing, saves every response from the API into this folder so they can be played back later with '--Replay'.")
+parser.add_argument("--Replay", help="Used for development and testing, plays back the API responses saved with '--Record' in this folder instead of using the API, so no connection is needed.")
+parser.add_argument("--ReplaySpeed", type=float, default=0, help="When replaying, how many times faster than they were recorded the responses are played back, 0 plays each back as soon as it is requested; default is 0.")
+parser.add_argument("--JourneyCacheTTL", help="How long a service's list of stops is reused for before being requested again, each request counts towards your Transport API usage; default is 24(hours), must be greater than 0.", type=check_positive, default=24)
+parser.add_argument("--JourneyWorkers", help="How many services' lists of stops can be requested at the same time; default is 4, must be greater than 0.", type=check_positive, default=4)
+parser.add_argument("--DailyCallBudget", help="The most Transport API requests the display will make in a day, new data is requested more often when a bus is due soon and less often when it is not; default is 1000, must be greater than 0.", type=check_positive, default=1000)
+parser.add_argument("--MaxPollInterval", help="The longest the display will wait before requesting new data, even if no bus is due soon; default is 900(seconds), this should be higher than your 'RequestLimit'", type=check_positive, default=900)
+parser.add_argument("--MergeWindow", help="When showing several stops, a bus on the same line, direction and operator departing within this many minutes of one already shown is treated as the same bus; default is 2, must be greater than 0.", type=check_positive, default=2)
+parser.add_argument("--CacheDir", default="%s/cache" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))), help="The folder used to keep data between restarts, such as the stops each bus service visits; default is the 'cache' folder next to this program.")
 # parser.add_argument("--no-pip-update",dest='NoPipUpdate',  action='store_true', default=False, help="By default, the program will update any software dependencies/ pip libraries, this is to ensure your display still works correctly and has the required security updates. However, if you wish you can use this tag to disable pip updates and downloads. ")
 
 
@@ -75,7 +99,7 @@ parser.add_argument("--filename",dest='filename', default="output.gif", help="Us
 requiredNamed = parser.add_argument_group('required named arguments')
 requiredNamed.add_argument("-a","--APIID", help="The API ID code for the Transport API, get your own from: https://developer.transportapi.com/", type=str,required=True)
 requiredNamed.add_argument("-k","--APIKey", help="The API Key code for the Transport API, get your own from: https://developer.transportapi.com/", type=str,required=True)
-requiredNamed.add_argument("-s","--StopID", help="The Naptan Code for the specific bus stop you wish to display.", type=str,required=True)
+requiredNamed.add_argument("-s","--StopID", help="The Naptan Code for the specific bus stop you wish to display. To show several stops on one board, such as both sides of a road, list each code with a space between them.", type=str,nargs='+',required=True)
 requiredNamed.add_argument("-b","--NextBus", choices=['yes','no'],default='no', help="Some regions (mainly any region outside London) need the NextBus API to get live data, you are however limited to only 100 API calls per day (around 1.5hrs on normal request limit settings). Once you have exceeded this limit the display cannot get any more data. Instead we recommend only getting scheduled arrival times, not using the NextBus API for full *day usage. *Assuming Energy saving mode is enabled.", type=str,required=True)
 
 Args = parser.parse_args()
@@ -90,6 +114,188 @@ SmallFont = ImageFont.truetype("%s/resources/lower.ttf" % (os.path.dirname(os.pa
 Vias = {"0":"Via London Bridge"}
 Dest = {"0":"Central London"}
 
+# Creates the folder used to keep data between restarts.
+os.makedirs(Args.CacheDir, exist_ok=True)
+
+
+# Keeps the stops visited by each journey seen, saved to disk as every request for them counts towards the Transport API usage.
+# A journey is its line, direction and operator, so buses going the opposite way or run by another operator each get their own stops.
+class JourneyCache():
+	def __init__(self, path, ttl):
+		self.path = path
+		self.ttl = ttl
+		self.lock = threading.Lock()
+		# The time each journey's stops were found and the stops, as [locality, stop name], by journey.
+		self.Journeys = {}
+		# The journeys whose stops were kept from a previous run and have not been looked up yet in this one.
+		self.FromDisk = set()
+		# Lookups of stops kept from a previous run, each saving a Transport API request; lookups of stops already found in this run; and requests made.
+		self.saved = 0
+		self.hits = 0
+		self.misses = 0
+		self.load()
+
+	def load(self):
+		try:
+			with open(self.path) as file:
+				self.Journeys = json.load(file)
+			self.FromDisk = set(self.Journeys)
+		except FileNotFoundError:
+			pass
+		except Exception as e:
+			print("Unable to load the saved journeys - " + str(e))
+
+	def save(self):
+		try:
+			with self.lock:
+				with open(self.path + ".tmp", "w") as file:
+					json.dump(self.Journeys, file)
+				os.replace(self.path + ".tmp", self.path)
+		except Exception as e:
+			print("Unable to save the journeys - " + str(e))
+
+	# Returns the journey's stops, or None if they are not known or are too old to be trusted.
+	def get(self, journey):
+		with self.lock:
+			entry = self.Journeys.get(journey)
+			if entry is None or time.time() - entry["time"] > self.ttl:
+				return None
+			return entry["stops"]
+
+	def put(self, journey, stops):
+		with self.lock:
+			self.Journeys[journey] = {"time": time.time(), "stops": stops}
+			self.FromDisk.discard(journey)
+		# Any via message made from the old stops is out of date.
+		Vias.pop(journey, None)
+		Dest.pop(journey, None)
+
+	# Records whether a journey's stops were known or had to be requested.
+	# Only the first lookup in this run of stops kept from a previous run saves a request, as later lookups were never requested again before they were kept.
+	def record(self, journey, hit):
+		with self.lock:
+			if not hit:
+				self.misses += 1
+			elif journey in self.FromDisk:
+				self.saved += 1
+			else:
+				self.hits += 1
+			self.FromDisk.discard(journey)
+
+Journeys = JourneyCache("%s/NationalBusesJourneys.json" % Args.CacheDir, Args.JourneyCacheTTL * 3600)
+
+
+# Decides when to next request new data, so the daily call budget is spent when buses are due rather than evenly through the day.
+# The number of requests made today is saved to disk so restarting the display does not reset it.
+class PollScheduler():
+	def __init__(self, path, budget):
+		self.path = path
+		self.budget = budget
+		self.lock = threading.Lock()
+		self.Day = str(datetime.now().date())
+		self.calls = 0
+		# True when the count has changed since it was last saved.
+		self.dirty = False
+		# The time the next request is wanted, start up requests straight away.
+		self.NextPoll = time.time()
+		self.load()
+
+	def load(self):
+		try:
+			with open(self.path) as file:
+				stored = json.load(file)
+			if stored["day"] == self.Day:
+				self.calls = stored["calls"]
+		except FileNotFoundError:
+			pass
+		except Exception as e:
+			print("Unable to load the saved request count - " + str(e))
+
+	def save(self):
+		try:
+			with open(self.path + ".tmp", "w") as file:
+				json.dump({"day": self.Day, "calls": self.calls}, file)
+			os.replace(self.path + ".tmp", self.path)
+			self.dirty = False
+		except Exception as e:
+			print("Unable to save the request count - " + str(e))
+
+	# Saves the count if it has changed, called once each poll and on exit rather than after every request.
+	def flush(self):
+		with self.lock:
+			if self.dirty:
+				self.save()
+
+	# Starts counting again at the start of each day.
+	def rollover(self):
+		today = str(datetime.now().date())
+		if today != self.Day:
+			self.Day = today
+			self.calls = 0
+			self.dirty = True
+
+	# Records a request made to the Transport API. Responses played back with '--Replay' are not requests to the API, so are not counted.
+	def record(self, calls=1):
+		if Args.Replay:
+			return
+		with self.lock:
+			self.rollover()
+			self.calls += calls
+			self.dirty = True
+
+	# Returns how many seconds are left today in which requests will be made, not counting the inactive hours if the display turns off.
+	@staticmethod
+	def ActiveSecondsLeft():
+		now = datetime.now()
+		nowSec = now.hour * 3600 + now.minute * 60 + now.second
+		left = 86400 - nowSec
+		if Args.EnergySaverMode == "off":
+			start = Args.InactiveHours[0].hour * 3600 + Args.InactiveHours[0].minute * 60
+			end = Args.InactiveHours[1].hour * 3600 + Args.InactiveHours[1].minute * 60
+			inactive = [(start, end)] if start < end else [(start, 86400), (0, end)]
+			for a, b in inactive:
+				left -= max(0, min(b, 86400) - max(a, nowSec))
+		return max(left, 1)
+
+	# Works out when to next request new data from how soon the next bus is due and how much of the budget is left.
+	# If the last request failed (services is None) try again after the request limit.
+	def schedule(self, services):
+		with self.lock:
+			self.rollover()
+			remaining = self.budget - self.calls
+			if remaining <= 0:
+				# Budget spent, wait until tomorrow.
+				now = datetime.now()
+				interval = 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+			else:
+				soonest = min([service.SecondsUntilDeparture() for service in services or []], default=None)
+				# Check again around halfway to the next bus, as that is when its time is most likely to have changed.
+				if services is None:
+					interval = Args.RequestLimit
+				elif soonest is None:
+					interval = Args.MaxPollInterval
+				else:
+					interval = min(max(soonest / 2, Args.RequestLimit), Args.MaxPollInterval)
+				# The interval which would spread the rest of the budget evenly over the rest of the day.
+				fair = self.ActiveSecondsLeft() / remaining
+				# Spend more than the even share while a bus is on its countdown, the quiet periods make up for it.
+				if soonest is not None and soonest <= 15 * 60:
+					fair = fair / 2
+				interval = max(interval, fair)
+			self.NextPoll = time.time() + interval
+			if self.dirty:
+				self.save()
+
+	# Returns true once it is time to request new data.
+	def due(self):
+		return time.time() >= self.NextPoll
+
+	# Describes the current decision, such as "next poll in 140s, 612/1000 calls used".
+	def describe(self):
+		return "next poll in %ds, %d/%d calls used" % (max(0, self.NextPoll - time.time()), self.calls, self.budget)
+
+Scheduler = PollScheduler("%s/NationalBusesPolls.json" % Args.CacheDir, Args.DailyCallBudget)
+
 
 if Args.LargeLineName and Args.ShowIndex:
 	print("You can not have both '--ExtraLargeLineName' and '--ShowIndex' turned on at the same time.")
@@ -98,6 +304,201 @@ if Args.LargeLineName and Args.ShowIndex:
 if Args.NextBus == 'yes':
 	print("Warning : Any region covered by the NextBus API has a limit of 100 API calls per day, which will not last you a full day of usage.")
 
+if Args.Record and Args.Replay:
+	print("You can not have both '--Record' and '--Replay' turned on at the same time.")
+	sys.exit()
+
+###
+# Below contains the recorder, which can save every response from the API (--Record) and play them back instead of using the API (--Replay).
+###
+# Saves each API response with the time it was received, or plays them back in the same order, so the board can be run and timed without the API.
+class Recorder():
+	# Parts of a request which are secret, these are not saved and are ignored when matching requests to responses.
+	Secrets = re.compile(r"(api_token|app_id|app_key)=[^&]*")
+
+	def __init__(self, record, replay, speed):
+		self.record = record
+		self.replay = replay
+		self.speed = speed
+		self.lock = threading.Lock()
+		self.seq = 0
+		# The saved responses not yet played back, by request.
+		self.Responses = {}
+		# When the first response was played back and when it was received, used to play the rest back at the same pace.
+		self.Start = None
+		if record:
+			os.makedirs(record, exist_ok=True)
+		if replay:
+			with open("%s/index.jsonl" % replay) as file:
+				for line in file:
+					entry = json.loads(line)
+					self.Responses.setdefault(entry["key"], []).append(entry)
+
+	# Returns what a request is saved under, the URL without any secrets.
+	@staticmethod
+	def Key(url):
+		return Recorder.Secrets.sub(r"\1=", url)
+
+	# Saves a response in the record folder.
+	def save(self, key, status, headers, body):
+		with self.lock:
+			self.seq += 1
+			fileName = "%06d.bin" % self.seq
+			with open("%s/%s" % (self.record, fileName), "wb") as file:
+				file.write(body)
+			with open("%s/index.jsonl" % self.record, "a") as file:
+				file.write(json.dumps({"seq": self.seq, "time": time.time(), "key": key, "status": status, "headers": list(headers.items()), "file": fileName}) + "\n")
+
+	# Returns the next saved status, headers and body for the request. Once all of them have been played back the last one is repeated.
+	# If a replay speed is given, each is not returned until the same time has passed since the first as when recorded, divided by the speed.
+	def load(self, key):
+		with self.lock:
+			entries = self.Responses.get(key)
+			if not entries:
+				raise Exception("No recorded response for %s" % key)
+			entry = entries.pop(0) if len(entries) > 1 else entries[0]
+			if self.Start is None:
+				self.Start = (time.time(), entry["time"])
+		if self.speed > 0:
+			wait = self.Start[0] + (entry["time"] - self.Start[1]) / self.speed - time.time()
+			if wait > 0:
+				time.sleep(wait)
+
+		headers = http.client.HTTPMessage()
+		for name, value in entry["headers"]:
+			headers[name] = value
+		with open("%s/%s" % (self.replay, entry["file"]), "rb") as file:
+			return entry["status"], headers, file.read()
+
+Recordings = Recorder(Args.Record, Args.Replay, Args.ReplaySpeed)
+
+###
+# Below contains the HTTP client used for every request made to the API.
+###
+# The result of a request, with the body already read and decompressed. It can be used in the same way as the response from urlopen.
+class HttpResponse():
+	def __init__(self, status, headers, body):
+		self.status = status
+		self.headers = headers
+		self.body = body
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		return False
+
+	def read(self):
+		return self.body
+
+	def getcode(self):
+		return self.status
+
+# Keeps connections open to each website between requests, so each request does not pay for looking up the website and connecting (the TLS handshake) again.
+# Responses are requested compressed, and connecting and waiting for a response are both given a time limit so a bad connection can not hang the display.
+class HttpClient():
+	def __init__(self, connectTimeout, readTimeout):
+		self.connectTimeout = connectTimeout
+		self.readTimeout = readTimeout
+		self.lock = threading.Lock()
+		# Open connections not currently in use, by scheme and host. More than one may be open when requests are made at the same time.
+		self.idle = {}
+		# The proxies set in the environment, by scheme.
+		self.proxies = getproxies()
+
+	# Returns the proxy to use for the host from the environment (HTTPS_PROXY, HTTP_PROXY and NO_PROXY) as urlopen does, or None to connect directly.
+	def proxy(self, scheme, host):
+		proxy = self.proxies.get(scheme)
+		if not proxy or proxy_bypass_environment(host, self.proxies):
+			return None
+		return urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+	# Returns the headers to log in to the proxy with, if it needs it.
+	@staticmethod
+	def ProxyHeaders(proxy):
+		if not proxy.username:
+			return {}
+		login = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+		return {"Proxy-Authorization": "Basic " + base64.b64encode(login.encode()).decode()}
+
+	# Returns an open connection to the host and whether it has been used before.
+	def connection(self, scheme, host):
+		with self.lock:
+			if self.idle.get((scheme, host)):
+				return self.idle[(scheme, host)].pop(), True
+		proxy = self.proxy(scheme, host)
+		if proxy is not None and scheme == "https":
+			# Secure requests are tunnelled through the proxy to the host.
+			conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+			conn.set_tunnel(host, headers=self.ProxyHeaders(proxy))
+		elif proxy is not None:
+			conn = http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+		elif scheme == "https":
+			conn = http.client.HTTPSConnection(host, timeout=self.connectTimeout)
+		else:
+			conn = http.client.HTTPConnection(host, timeout=self.connectTimeout)
+		conn.connect()
+		conn.sock.settimeout(self.readTimeout)
+		return conn, False
+
+	def release(self, scheme, host, conn):
+		with self.lock:
+			self.idle.setdefault((scheme, host), []).append(conn)
+
+	# Makes a GET request, following any redirects, and returns a HttpResponse.
+	def request(self, url, headers={}, redirects=3):
+		parts = urlsplit(url)
+		path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+		sendHeaders = {"Accept-Encoding": "gzip", "User-Agent": "Mozilla/5.0"}
+		sendHeaders.update(headers)
+		proxy = self.proxy(parts.scheme, parts.netloc)
+		if proxy is not None and parts.scheme == "http":
+			# Plain requests through a proxy ask it for the whole URL.
+			path = url
+			sendHeaders.update(self.ProxyHeaders(proxy))
+
+		for attempt in range(2):
+			conn, reused = self.connection(parts.scheme, parts.netloc)
+			try:
+				conn.request("GET", path, headers=sendHeaders)
+				response = conn.getresponse()
+				body = response.read()
+				break
+			except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+				conn.close()
+				# The website may have closed a connection which had been left open, if so try again once with a new one.
+				if not reused or attempt == 1:
+					raise
+			except Exception:
+				conn.close()
+				raise
+
+		if response.will_close:
+			conn.close()
+		else:
+			self.release(parts.scheme, parts.netloc, conn)
+
+		if response.getheader("Content-Encoding", "") == "gzip":
+			body = gzip.decompress(body)
+		if response.status in (301, 302, 303, 307, 308) and response.getheader("Location") and redirects > 0:
+			return self.request(urljoin(url, response.getheader("Location")), headers, redirects - 1)
+		return HttpResponse(response.status, response.msg, body)
+
+	# Makes a GET request and returns a HttpResponse, saving the response if recording or playing one back if replaying. Like urlopen an error is raised if the request failed.
+	def get(self, url, headers={}):
+		key = Recorder.Key(url)
+		if Args.Replay:
+			response = HttpResponse(*Recordings.load(key))
+		else:
+			response = self.request(url, headers)
+			if Args.Record:
+				Recordings.save(key, response.status, response.headers, response.body)
+		if response.status >= 400:
+			raise Exception("HTTP Error %d" % response.status)
+		return response
+
+Http = HttpClient(Args.ConnectTimeout, Args.ReadTimeout)
+
 ###
 # Below contains the class which is used to reperesent one instance of a service record. It is also responsible for getting the information from the Transport API.
 ###
@@ -111,15 +512,73 @@ class LiveTimeStud():
 		self.ExptArrival = " "
 		self.Via = " "
 		self.ID =  "0"
-	
-	def TimePassedStatic(self):
-		return False
 		
 	
+# The times of a service, converted once when the data is retrieved instead of every time they are shown. Every time is in seconds since the epoch.
+class Departure():
+	__slots__ = ("Scheduled", "Expected")
+	# The time zone the API gives local times in. Its offset from UTC and when its last midnight was are worked out by Refresh().
+	Zone = ZoneInfo(Args.TimeZone)
+	Offset = 0
+	Midnight = 0
+
+	def __init__(self, Scheduled, Expected):
+		self.Scheduled = Scheduled
+		# The predicted time, None if it is not known.
+		self.Expected = Expected
+
+	# Returns the predicted time if known, else the time tabled time.
+	def Best(self):
+		return self.Scheduled if self.Expected is None else self.Expected
+
+	# Returns how many minutes until the service is due, negative once it should have already gone.
+	def MinutesUntil(self):
+		return (self.Best() - time.time()) / 60
+
+	# Returns when a count down to the time next changes, in seconds since the epoch: when it comes within 'Limit' minutes, then as each
+	# whole minute passes until it is within 'Due' minutes, where it stays the same. Returns None once it will not change again.
+	def NextChange(self, Due, Limit):
+		Seconds = self.Best()
+		left = Seconds - time.time()
+		if left <= Due * 60:
+			return None
+		if left >= Limit * 60:
+			return Seconds - Limit * 60
+		return Seconds - int(left // 60) * 60
+
+	# Works out the time zone's offset from UTC, and when its last midnight was, once each time new data is retrieved instead of for every time converted.
+	@staticmethod
+	def Refresh():
+		now = int(time.time())
+		Departure.Offset = int(datetime.fromtimestamp(now, Departure.Zone).utcoffset().total_seconds())
+		Departure.Midnight = (now + Departure.Offset) // 86400 * 86400 - Departure.Offset
+
+	# Converts a time of day ("HH:MM") to seconds since the epoch, or None if it is not a time. Times are given without a date,
+	# so the one closest to now is used, which is tomorrow for times just after midnight or yesterday for those just before.
+	@staticmethod
+	def FromClock(Text):
+		if not Text or len(Text) != 5 or Text[2] != ':' or not Text[:2].isdigit() or not Text[3:].isdigit():
+			return None
+		moment = Departure.Midnight + int(Text[:2]) * 3600 + int(Text[3:]) * 60
+		now = time.time()
+		if moment - now < -12 * 3600:
+			moment += 86400
+		elif moment - now > 12 * 3600:
+			moment -= 86400
+		return moment
+
+	# Returns a time in seconds since the epoch as shown on the display, in the time zone.
+	@staticmethod
+	def Clock(Seconds):
+		return time.strftime("%H:%M" if (Args.TimeFormat==24) else "%I:%M", time.gmtime(Seconds + Departure.Offset))
+
+
 # Used to get live data from the Transport API and represent a specific services and it's details.
 class LiveTime(object):
 	# The last time an API call was made to get new data.
 	LastUpdate = datetime.now()
+	# How a service can have changed from one lot of data to the next, as far as what is shown on the display.
+	ServiceChanges = ["unchanged", "time-changed", "new", "departed"]
 
 	# * Change this method to implement your own API *
 	def __init__(self, Data, Index):
@@ -129,25 +588,61 @@ class LiveTime(object):
 		self.Destination = str(Data['direction'])
 		self.SchArrival = str(Data['aimed_departure_time'])
 		self.ExptArrival = str(Data['best_departure_estimate'])
+		# The times converted once, so they are not converted again each time they are shown.
+		self.Times = Departure(Departure.FromClock(self.SchArrival), Departure.FromClock(self.ExptArrival))
 		# The "Via" message, which lists where the service will go through, if unknown use generic message.
-		self.Via = self.GetComplexVia(str(Data['line_name']) )
+		self.Via = self.GetComplexVia(self.GetJourney(Data))
 		# The formated string containing the time of arrival, to be printed on the display screen.
 		self.DisplayTime = self.GetDisplayTime()
 
 	#Returns the value to display the time on the board.
 	def GetDisplayTime(self):
-		# Last time the display screen was updated to reflect the new time of arrival.
-		self.LastStaticUpdate = datetime.now()
 		
-		Arrival = datetime.strptime(str(datetime.now().date()) + " "  + self.ExptArrival, '%Y-%m-%d %H:%M')
 		# The difference between the time now and when it is predicted to arrive.	
-		Diff =  (Arrival - datetime.now()).total_seconds() / 60
+		Diff = self.Times.MinutesUntil()
 		if Diff <= 2:
 			return ' Due'
 		if Diff >=15 :
-			return ' ' + Arrival.time().strftime("%H:%M" if (Args.TimeFormat==24) else  "%I:%M")
+			return ' ' + Departure.Clock(self.Times.Best())
 		return  ' %d min' % Diff
 
+	# Returns how many seconds until the service is expected to depart, negative if it should have already.
+	def SecondsUntilDeparture(self):
+		return self.Times.Best() - time.time()
+
+	# Compares a service with the same service from newer data, returning what has changed of what is shown on the display.
+	# Any change other than the time means the whole card has to be drawn again, so is treated as a new service.
+	@staticmethod
+	def ClassifyService(old, new):
+		if old is None:
+			return "new"
+		if new is None:
+			return "departed"
+		if (old.ServiceNumber, old.Destination, old.Via) != (new.ServiceNumber, new.Destination, new.Via):
+			return "new"
+		if old.DisplayTime != new.DisplayTime:
+			return "time-changed"
+		return "unchanged"
+
+	# Compares the last and newest services, returning how each has changed by ID, including those no longer given as departed.
+	@staticmethod
+	def DiffServices(old, new):
+		previous = {service.ID: service for service in old}
+		changes = {service.ID: LiveTime.ClassifyService(previous.get(service.ID), service) for service in new}
+		for ID in previous:
+			if ID not in changes:
+				changes[ID] = "departed"
+		return changes
+
+	# Returns true if the service is expected to have already departed.
+	def HasDeparted(self):
+		return self.SecondsUntilDeparture() < 0
+
+	# Returns how many seconds until the given time of day ("HH:MM").
+	@staticmethod
+	def SecondsUntil(Time):
+		return Departure.FromClock(Time) - time.time()
+
 	def GetServiceNumber(self, Data, Index):
 		if Args.ServiceName == "1":
 			return "%s.%s" % (Index + 1,str(Data['line'])) if Args.ShowIndex else str(Data['line']) 
@@ -155,6 +650,24 @@ class LiveTime(object):
 			return "%s.%s" % (Index + 1,str(Data['line_name'])) if Args.ShowIndex else str(Data['line_name']) 
 
 
+	# Returns the key a journey is saved under, buses on the same line going the other way or run by another operator stop at different places.
+	@staticmethod
+	def GetJourney(Data):
+		return "%s|%s|%s" % (Data['line_name'], Data['direction'], Data['operator_name'])
+
+	# Requests the stops a journey visits, as [locality, stop name], returning None if they could not be found.
+	@staticmethod
+	def GetJourneyStops(URL):
+		try:
+			Scheduler.record()
+			with Http.get(URL) as conn:
+				tempLocs = json.loads(conn.read())
+			return [[str(loc['locality']), str(loc['stop_name'])] for loc in tempLocs['stops']]
+		except Exception as e:
+			print("GetJourneyStops() ERROR")
+			print(str(e))
+			return None
+
 	# The "Via" message is not given by the API, this method generates the Via message and returns it.
 	def GetComplexVia(self, Service):
 		Via = ""
@@ -170,13 +683,20 @@ class LiveTime(object):
 				self.Destination = Dest[Service]
 			return Vias[Service]
 		
-		#Else this is the first time finding this service so look it up.
+		#Else this is the first time finding this service so look it up, normally GetData() will already have done so.
 		ViasTemp = []
 		try:
-			tempLocs = json.loads(urlopen(self.ID).read())
+			stops = Journeys.get(Service)
+			if stops is None:
+				stops = self.GetJourneyStops(self.ID)
+				if stops is None:
+					# Try again next time rather than keeping a via without any stops.
+					return Via + "."
+				Journeys.put(Service, stops)
+				Journeys.save()
 
 			if Args.Destination == "2":
-				Dest[Service] = tempLocs['stops'][-1]['stop_name']
+				Dest[Service] = stops[-1][1]
 				self.Destination = Dest[Service]
 		
 			if Args.ReducedAnimations or Args.ViaMessageMode == "operator":
@@ -184,16 +704,16 @@ class LiveTime(object):
 				return Vias[Service]
 
 			Via += " Via: "
-			for loc in tempLocs['stops']:
+			for locality, stopName in stops:
 				if Args.ViaMessageMode == "full":
-					if (loc['locality'] + ", ") not in Via:
-						Via += loc['locality'] + ", "
+					if (locality + ", ") not in Via:
+						Via += locality + ", "
 				elif Args.ViaMessageMode =="shorten":
-					if (str(loc['locality'].split(',')[0]) + ", ") not in Via:
-						Via += (str(loc['locality'].split(',')[0]) + ", ")
+					if (str(locality.split(',')[0]) + ", ") not in Via:
+						Via += (str(locality.split(',')[0]) + ", ")
 				elif Args.ViaMessageMode =="reduced" or  Args.ViaMessageMode == "fixed":
-					if (str(loc['locality'].split(',')[0]) + ", ") not in ViasTemp:
-						ViasTemp.append(str(loc['locality'].split(',')[0]) + ", ")  
+					if (str(locality.split(',')[0]) + ", ") not in ViasTemp:
+						ViasTemp.append(str(locality.split(',')[0]) + ", ")  
 
 			if Args.ViaMessageMode =="reduced":
 				for i in range(len(ViasTemp)): 
@@ -218,35 +738,102 @@ class LiveTime(object):
 		Dest[Service] = self.Destination
 		return Vias[Service]
 
-	# Returns true or false dependent upon if the last time an API data call was made was over the request limit; to prevent spamming the API feed.
+	# Returns true or false dependent upon if the poll scheduler wants new data yet; to keep within the daily call budget.
 	@staticmethod
 	def TimePassed():
-		return (datetime.now() - LiveTime.LastUpdate).total_seconds() > Args.RequestLimit
+		return Scheduler.due()
+
+	# Returns when the time shown for the service next changes, in seconds since the epoch, or None if it will not change again.
+	def NextLabelChange(self):
+		return self.Times.NextChange(2, 15)
 
-	# Return true or false dependent upon if the last time the display was updated was over the static update limit. This prevents updating the display to frequently to increase performance.
-	def TimePassedStatic(self):
-		return ("min" in self.DisplayTime) and (datetime.now() - self.LastStaticUpdate).total_seconds() > Args.StaticUpdateLimit 
 
+	# Gets the departures from one stop, sorted by when they are expected to depart, or None if they could not be found.
+	@staticmethod
+	def GetStopDepartures(StopID):
+		breaker = CircuitBreaker.For("Transport API stop %s" % StopID)
+		if not breaker.allow():
+			return None
+		fetchStart = time.time()
+		try:
+			Scheduler.record()
+			with Http.get("https://transportapi.com/v3/uk/bus/stop/%s/live.json?app_id=%s&app_key=%s&group=no&limit=%s&nextbuses=%s" %  (StopID, Args.APIID, Args.APIKey, max(3,Args.NumberOfCards),Args.NextBus)) as conn:
+				tempServices = json.loads(conn.read())
+			departures = [service for service in tempServices['departures']['all'] if str(service['line']) not in Args.ExcludeServices]
+			for service in departures:
+				service['StopID'] = StopID
+			departures.sort(key=lambda service: LiveTime.SecondsUntil(service['best_departure_estimate']))
+			print_safe("Stop %s: %d departures in %.2fs" % (StopID, len(departures), time.time() - fetchStart))
+			breaker.success()
+			return departures
+		except Exception as e:
+			breaker.failure()
+			print("GetStopDepartures(%s) ERROR" % StopID)
+			print(str(e))
+			return None
 
 	# Calls the API and gets the data from it, returning a list of LiveTime objects to be used in the program.
 	# * Change this method to implement your own API *
 	@staticmethod
 	def GetData():
 		LiveTime.LastUpdate = datetime.now()
+		Departure.Refresh()
 		services = []
 		
 		try:
-			with urlopen("https://transportapi.com/v3/uk/bus/stop/%s/live.json?app_id=%s&app_key=%s&group=no&limit=%s&nextbuses=%s" %  (Args.StopID, Args.APIID, Args.APIKey, max(3,Args.NumberOfCards),Args.NextBus)) as conn:
-				tempServices = json.loads(conn.read())
-				for service in tempServices['departures']['all']:
-					# If not in excluded services list, convert custom API object to LiveTime object and add to list.
-					if str(service['line']) not in Args.ExcludeServices:
-						services.append(LiveTime(service, len(services)))
-				return services
+			mergeStart = time.time()
+			# Every stop is requested at the same time.
+			with ThreadPoolExecutor(max_workers=len(Args.StopID)) as pool:
+				stops = [stop for stop in pool.map(LiveTime.GetStopDepartures, Args.StopID) if stop is not None]
+			if not stops:
+				raise Exception("Unable to get departures from any stop")
+
+			# Merge the stops in order of departure. Stops next to each other can both be served by the same bus, so skip any bus on the
+			# same line, direction and operator departing within the merge window of one already added from another stop.
+			departures = []
+			lastSeen = {}
+			for service in heapq.merge(*stops, key=lambda service: LiveTime.SecondsUntil(service['best_departure_estimate'])):
+				journey = LiveTime.GetJourney(service)
+				departs = LiveTime.SecondsUntil(service['best_departure_estimate'])
+				if journey in lastSeen and lastSeen[journey][1] != service['StopID'] and departs - lastSeen[journey][0] <= Args.MergeWindow * 60:
+					continue
+				lastSeen[journey] = (departs, service['StopID'])
+				departures.append(service)
+				if len(departures) >= max(3,Args.NumberOfCards):
+					break
+			if len(Args.StopID) > 1:
+				print_safe("Merged %d stops into %d departures in %.2fs" % (len(stops), len(departures), time.time() - mergeStart))
+
+			# Request the stops of every journey not already known at the same time, rather than one by one as each service is created.
+			unknown = {}
+			for service in departures:
+				journey = LiveTime.GetJourney(service)
+				if journey in unknown:
+					continue
+				if Journeys.get(journey) is not None:
+					Journeys.record(journey, True)
+				else:
+					Journeys.record(journey, False)
+					unknown[journey] = str(service['id'])
+			if unknown:
+				with ThreadPoolExecutor(max_workers=Args.JourneyWorkers) as pool:
+					for journey, stops in zip(unknown.keys(), pool.map(LiveTime.GetJourneyStops, unknown.values())):
+						if stops is not None:
+							Journeys.put(journey, stops)
+				Journeys.save()
+			print_safe("Journey stops: %d requested this refresh; so far %d Transport API requests saved by stops kept from a previous run, %d made, and %d lookups of stops already found in this run" % (len(unknown), Journeys.saved, Journeys.misses, Journeys.hits))
+
+			for service in departures:
+				# Convert custom API object to LiveTime object and add to list.
+				services.append(LiveTime(service, len(services)))
+			Scheduler.schedule(services)
+			print_safe("Poll scheduler: %s" % Scheduler.describe())
+			return services
 		except Exception as e:
 			print("GetData() ERROR")
 			print(str(e))
-			return []
+			Scheduler.schedule(None)
+			return None
 
 
 
@@ -266,6 +853,26 @@ class TextImage():
 		self.height = 5 + BasicFontHeight
 		del draw
 
+# Keeps the images of the times shown on the board, so each is only drawn once rather than every time it changes.
+# Every count down label is drawn when the display starts, any other (such as 'HH:MM') the first time it is shown.
+class LabelAtlas():
+	# How many labels drawn when first shown are kept before they are all forgotten, so a board left running does not keep every time of day.
+	Limit = 256
+
+	def __init__(self, device, labels):
+		self.device = device
+		self.Labels = dict((label, TextImage(device, label)) for label in labels)
+		self.Shown = {}
+
+	# Returns the image of the label, only drawing it if it has not been already.
+	def get(self, label):
+		image = self.Labels.get(label) or self.Shown.get(label)
+		if image is None:
+			if len(self.Shown) >= self.Limit:
+				self.Shown.clear()
+			image = self.Shown[label] = TextImage(self.device, label)
+		return image
+
 # Used to create the Service number text box, due to needing to adjust font size dynamically.
 class TextImageServiceNumber():
 	def __init__(self, device, text):
@@ -294,16 +901,17 @@ class StaticTextImage():
 	def __init__(self, device, service, previous_service):			
 		self.image = Image.new(device.mode, (device.width, 32))
 		draw = ImageDraw.Draw(self.image)
-		displayTimeTempPrevious = TextImage(device, previous_service.DisplayTime)
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTempPrevious = Labels.get(previous_service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
+		# The times are copied from the label atlas rather than drawn, before the rest of the text is drawn over them.
+		self.image.paste(displayTimeTemp.image, (device.width - displayTimeTemp.width, 16))
+		self.image.paste(displayTimeTempPrevious.image, (device.width - displayTimeTempPrevious.width, 0))
 
 		draw.text((0, 16), service.ServiceNumber, font=BasicFont if len(service.ServiceNumber) <= 3 else SmallFont, fill="white")
-		draw.text((device.width - displayTimeTemp.width, 16), service.DisplayTime, font=BasicFont, fill="white")
 		draw.text((45 if Args.ShowIndex or Args.LargeLineName else 30, 16), service.Destination, font=BasicFont, fill="white")	
 
 		draw.text((45 if Args.ShowIndex or Args.LargeLineName else 30, 0), previous_service.Destination, font=BasicFont, fill="white")	
 		draw.text((0, 0), previous_service.ServiceNumber, font=BasicFont if len(previous_service.ServiceNumber) <= 3 else SmallFont, fill="white")
-		draw.text((device.width - displayTimeTempPrevious.width, 0), previous_service.DisplayTime, font=BasicFont, fill="white")
 	
 		self.width = device.width 
 		self.height = 32
@@ -380,6 +988,9 @@ class ScrollTime():
 	STUD_END = 9
 
 	STUD = -1
+
+	# The number of images which have not needed drawing again since it was last reset, as what they show had not changed.
+	RendersAvoided = 0
 	
 	def __init__(self, image_composition, service, previous_service, scroll_delay, synchroniser, device, position, controller):
 		self.speed = Args.Speed
@@ -409,10 +1020,13 @@ class ScrollTime():
 		self.synchroniser = synchroniser
 		self.render()
 		self.synchroniser.ready(self)
+		# Set by the countdown scheduler when the time shown is due to change.
+		self.LabelDue = False
+		Countdown.schedule(self)
 
 	# Generates all the Images (Text boxes) to be drawn on the display.
 	def generateCard(self,service):
-		displayTimeTemp = TextImage(device, service.DisplayTime)
+		displayTimeTemp = Labels.get(service.DisplayTime)
 		IDestinationTemp  = TextImageComplex(device, service.Destination,service.Via, displayTimeTemp.width)
 
 		self.IDestination =  ComposableImage(IDestinationTemp.image.crop((0,0,IDestinationTemp.width + 10,16)), position=(45 if Args.ShowIndex or Args.LargeLineName else 30, 16 * self.position))
@@ -421,11 +1035,21 @@ class ScrollTime():
 
 	# Called when you have new/updated information from an API call and want to update the objects predicted arrival time.
 	def updateCard(self, newService, device):
+		change = LiveTime.ClassifyService(self.CurrentService, newService)
+		if change == "new":
+			self.changeCard(newService, device)
+			return
 		self.state = self.SCROLL_DECIDER
 		self.synchroniser.ready(self)
+		self.CurrentService = newService
+		Countdown.schedule(self)
+		# Only draw the time again if it has changed.
+		if change == "unchanged":
+			ScrollTime.RendersAvoided += 1
+			return
 		self.image_composition.remove_image(self.IDisplayTime)
 
-		displayTimeTemp = TextImage(device, newService.DisplayTime)
+		displayTimeTemp = Labels.get(newService.DisplayTime)
 		self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))
 	
 		self.image_composition.add_image(self.IDisplayTime)
@@ -461,6 +1085,7 @@ class ScrollTime():
 
 		self.generateCard(newService)
 		self.CurrentService = newService
+		Countdown.schedule(self)
 		self.max_pos = self.IDestination.width
 		
 		self.state = self.WAIT_STUD if (newService.ID == "0") else self.WAIT_OPENING
@@ -482,14 +1107,21 @@ class ScrollTime():
 
 	# Called upon each time you want to get the next frame for the display.
 	def tick(self):
-		#Update X min till arrival.
-		if self.CurrentService.TimePassedStatic() and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
-			self.image_composition.remove_image(self.IDisplayTime)
-			self.CurrentService.DisplayTime = self.CurrentService.GetDisplayTime()
-			displayTimeTemp = TextImage(device, self.CurrentService.DisplayTime)
-			self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
-			self.image_composition.add_image(self.IDisplayTime)
-			self.image_composition.refresh()
+		#Update X min till arrival, once the countdown scheduler has woken the row as it is due to change.
+		if self.LabelDue and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
+			self.LabelDue = False
+			DisplayTime = self.CurrentService.GetDisplayTime()
+			# The time shown only needs drawing again if it has changed.
+			if DisplayTime == self.CurrentService.DisplayTime:
+				ScrollTime.RendersAvoided += 1
+			else:
+				self.CurrentService.DisplayTime = DisplayTime
+				self.image_composition.remove_image(self.IDisplayTime)
+				displayTimeTemp = Labels.get(self.CurrentService.DisplayTime)
+				self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(device.width - displayTimeTemp.width, 16 * self.position))           
+				self.image_composition.add_image(self.IDisplayTime)
+				self.image_composition.refresh()
+			Countdown.schedule(self)
 
 
 		if self.state == self.WAIT_OPENING:
@@ -605,13 +1237,189 @@ class ScrollTime():
 		return True
 
 
+###
+## Circuit Breaker
+## Stops requesting new data from an API endpoint which keeps failing, waiting longer after each failure before trying it again.
+###
+class CircuitBreaker():
+	# Every endpoint's circuit breaker, by name.
+	Breakers = {}
+
+	def __init__(self, name):
+		self.name = name
+		self.lock = threading.Lock()
+		# closed- requests are made as normal. open- no requests are made until OpenUntil. half-open- one trial request is being made.
+		self.State = "closed"
+		self.failures = 0
+		self.OpenUntil = 0
+
+	# Returns the circuit breaker for the endpoint, creating it the first time.
+	@staticmethod
+	def For(name):
+		if name not in CircuitBreaker.Breakers:
+			CircuitBreaker.Breakers[name] = CircuitBreaker(name)
+		return CircuitBreaker.Breakers[name]
+
+	# Returns true if any endpoint may be requested now, so there is a point in asking for new data.
+	@staticmethod
+	def Ready():
+		now = time.time()
+		return not CircuitBreaker.Breakers or any(breaker.State == "closed" or (breaker.State == "open" and now >= breaker.OpenUntil) for breaker in CircuitBreaker.Breakers.values())
+
+	# Returns true if a request may be made to the endpoint now. Once the wait is over a single trial request is let through.
+	def allow(self):
+		with self.lock:
+			if self.State == "closed":
+				return True
+			if self.State == "open" and time.time() >= self.OpenUntil:
+				self.setState("half-open", "trying again")
+				return True
+			return False
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+			if self.State != "closed":
+				self.setState("closed", "working again")
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			# The wait doubles with each failure in a row, up to the maximum. Half of it is random so many displays do not all try again at once.
+			backoff = min(Args.BackoffMax, Args.BackoffBase * 2 ** min(self.failures - 1, 20))
+			wait = backoff / 2 + random.uniform(0, backoff / 2)
+			self.OpenUntil = time.time() + wait
+			self.setState("open", "%d failures in a row, trying again in %ds" % (self.failures, wait))
+
+	def setState(self, state, reason):
+		self.State = state
+		print_safe("Circuit breaker for %s is %s - %s" % (self.name, state, reason))
+
+
+###
+## Departure Store
+## Keeps the last services retrieved, so the board carries on showing them while new data cannot be retrieved instead of showing "No Services".
+###
+class DepartureStore():
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.Services = []
+		# True when new data could not be retrieved, so the services are from an earlier request.
+		self.Stale = False
+		self.Updated = datetime.now()
+
+	# Keeps newly retrieved services, or if they could not be retrieved (None) marks the last ones as stale. Returns the services to show.
+	def update(self, services):
+		with self.lock:
+			if services is not None:
+				if self.Stale:
+					print_safe("New data retrieved, no longer showing the services from %s" % self.Updated.time())
+				self.Services = services
+				self.Stale = False
+				self.Updated = datetime.now()
+			elif self.Services and not self.Stale:
+				print_safe("Unable to get new data, showing the services from %s until it can be" % self.Updated.time())
+				self.Stale = True
+			return self.prune()
+
+	# Returns the services to show, dropping any which have departed since they were retrieved if they are stale.
+	def current(self):
+		with self.lock:
+			return self.prune()
+
+	# Only stale services are pruned. Fresh data is shown as the API gives it, as a service it still lists has not gone yet.
+	def prune(self):
+		if self.Stale:
+			self.Services = [service for service in self.Services if not service.HasDeparted()]
+		return self.Services
+
+
+###
+## Data Refresher
+## Gets new data in the background, so the display keeps animating while it waits for the API.
+###
+class DataRefresher():
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.wanted = threading.Event()
+		# Set each time a request has finished.
+		self.done = threading.Event()
+		self.Services = None
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	# Asks for new data to be retrieved, if it is not already being retrieved.
+	def request(self):
+		self.wanted.set()
+
+	# Asks for new data and waits until it has been retrieved, returning it. Only used before the board is first drawn, as there is nothing to show until then.
+	def fetch(self):
+		self.done.clear()
+		self.request()
+		self.done.wait()
+		return self.collect()
+
+	# Returns the newest finished list of services since it was last collected, or None if there is not one yet.
+	def collect(self):
+		with self.lock:
+			services = self.Services
+			self.Services = None
+		return services
+
+	def run(self):
+		while True:
+			self.wanted.wait()
+			self.wanted.clear()
+			services = Departures.update(LiveTime.GetData())
+			with self.lock:
+				self.Services = services
+			self.done.set()
+
+
+###
+## Countdown Scheduler
+## Works out when the time shown on each row will next change, so rows are only woken to update it then instead of checking every frame.
+###
+class CountdownScheduler():
+	# How long after the time shown is due to change to wake the row, as each time is still shown up to and including that moment.
+	Margin = 0.05
+
+	def __init__(self):
+		# The rows to wake, as (time to wake, order added, row, service it was showing).
+		self.heap = []
+		self.added = 0
+
+	# Schedules the row to be woken when the time shown for its service next changes.
+	def schedule(self, row):
+		service = row.CurrentService
+		if service.ID == "0":
+			return
+		# The time shown may already be out of date, if the data was retrieved a while before the row came to show it.
+		when = time.time() if service.GetDisplayTime() != service.DisplayTime else service.NextLabelChange()
+		if when is not None:
+			self.added += 1
+			heapq.heappush(self.heap, (when + self.Margin, self.added, row, service))
+
+	# Called every frame, wakes every row whose time shown is due to change. Otherwise only the soonest is looked at.
+	def tick(self):
+		now = time.time()
+		while self.heap and self.heap[0][0] <= now:
+			when, added, row, service = heapq.heappop(self.heap)
+			# A row which has moved on to another service has already been scheduled again for it.
+			if row.CurrentService is service:
+				row.LabelDue = True
+
+
 ###
 ## Board Controller
 ## Defines the board which controls what each off the rows in the display will show at any time.
 ###
 class boardFixed():
 	def __init__(self, image_composition, scroll_delay, device):
-		self.Services = LiveTime.GetData()   
+		# Every request is made by the refresher, so the board is built from the services it last retrieved. New data is asked for if it is due.
+		self.Services = Departures.current()
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
+			Refresher.request()
 		self.synchroniser = Synchroniser()
 		self.scroll_delay = scroll_delay
 		self.image_composition = image_composition
@@ -635,13 +1443,16 @@ class boardFixed():
 		
 	# Called upon every time a new frame is needed.
 	def tick(self):
+		Countdown.tick()
 		#If no data can be found.
 		if len(self.Services) == 0:
 			if self.ticks == 0:
 				self.image_composition.add_image(self.NoServices)
 
-			#Wait a period of time then try getting new data again.
+			#Wait a period of time then ask for new data again in the background, building the board again once it has been retrieved.
 			if not self.is_waiting():
+				Refresher.request()
+			if Refresher.collect() is not None:
 				self.top.delete()
 				del self.top
 				self.middel.delete()
@@ -656,14 +1467,30 @@ class boardFixed():
 			self.middel.tick()
 			self.bottom.tick()
 
+	# Logs how the services have changed since data was last retrieved, and how many images have not needed drawing again since.
+	def logChanges(self, services):
+		changes = list(LiveTime.DiffServices(self.Services, services).values())
+		print_safe("Services: %s - %d re-renders avoided since the last refresh" % (", ".join("%d %s" % (changes.count(change), change) for change in LiveTime.ServiceChanges), ScrollTime.RendersAvoided))
+		ScrollTime.RendersAvoided = 0
+
 	# Called when a row has completed one cycle of it's states and requests to change card, here the program decides what to do.
 	def requestCardChange(self, card, row):
-		# If it has cycled through all cards, cycle from start again, unless enough time has passed for a new API request.
+		# Ask for new data in the background once enough time has passed, so it is ready by the end of the cycle.
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
+			Refresher.request()
+
+		# If it has cycled through all cards, cycle from start again, using any new data which has been retrieved.
 		if (self.x > Args.NumberOfCards or self.x >len(self.Services)-1):
 			self.x = 1 if Args.FixToArrive else 0
-			if LiveTime.TimePassed():  
-				self.Services = LiveTime.GetData()
-				print_safe("New Data Retrieved %s" % datetime.now().time())
+			# Swap in the newest data once it has been retrieved in the background.
+			services = Refresher.collect()
+			if services is not None:
+				self.logChanges(services)
+				self.Services = services
+				if not Departures.Stale:
+					print_safe("New Data Retrieved %s" % datetime.now().time())
+			elif Departures.Stale:
+				self.Services = Departures.current()
 
 		# If there are more rows (3) than there is services scheduled show nothing.
 		if row > len(self.Services):       
@@ -692,10 +1519,10 @@ class boardFixed():
 		if  not (Args.FixToArrive and row == 1):
 			self.x = self.x + 1
 
-	# Used to add a time delay if there was an error with the last API request (providing a back off and wait mechanism)
+	# Keeps the board waiting, without being rebuilt, until new data may be requested again and an API's circuit breaker lets a request through.
 	def is_waiting(self):
 		self.ticks += 1
-		if self.ticks > Args.RecoveryTime:
+		if LiveTime.TimePassed() and CircuitBreaker.Ready():
 			self.ticks = 0
 			return False
 		return True	
@@ -728,6 +1555,13 @@ if Args.Display == 'gifanim':
 	device._max_frames = int(Args.maxframes)
 
 image_composition = ImageComposition(device)
+# Every count down the board can show, drawn once now rather than each time a row changes to it.
+Labels = LabelAtlas(device, [' Due'] + [' %d min' % Minutes for Minutes in range(2, 15)])
+Departures = DepartureStore()
+Countdown = CountdownScheduler()
+Refresher = DataRefresher()
+# The first data is waited for, as there is nothing to show until it arrives.
+Refresher.fetch()
 board = boardFixed(image_composition,Args.Delay,device)
 FontTime = ImageFont.truetype("%s/resources/time.otf"  % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))),16)
 device.contrast(255)
@@ -790,3 +1624,4 @@ try:
 			display()
 except KeyboardInterrupt:
 	pass
+Scheduler.flush()
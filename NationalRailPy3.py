@@ -5,17 +5,33 @@
 # Python 3 Required.
 
 import time
+import threading
+import queue
+import heapq
+import random
+import json
+import hashlib
 import inspect, os
 import sys
 import inflect
 import re
 import argparse
+from collections import OrderedDict
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from PIL import ImageFont, Image, ImageDraw
 from luma.core.render import canvas
 from luma.core import cmdline
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from luma.core.image_composition import ImageComposition, ComposableImage
-from nredarwin.webservice import DarwinLdbSession
+from nredarwin.webservice import DarwinLdbSession, WebServiceError, WellBehavedHttpTransport, DARWIN_WEBSERVICE_NAMESPACE
+from nredarwin.webservice import StationBoard, ServiceItemWithDetails
+from suds import WebFault, MethodNotFound
+from suds.client import Client
+from suds.cache import ObjectCache
+from suds.sax.element import Element
+from suds.transport import Reply
 
 
 ###
@@ -50,6 +66,8 @@ parser = argparse.ArgumentParser(
     description='National Rail Live Departure Board, to run the program you will need to pass it all of the required paramters and you may wish to pass any optional paramters.')
 parser.add_argument("-t", "--TimeFormat", help="Do you wish to use 24hr or 12hr time format; default is 24hr.",
                     type=int, choices=[12, 24], default=24)
+parser.add_argument("--TimeZone", help="The time zone the API gives times in and the display shows them in; default is Europe/London",
+                    type=str, default="Europe/London")
 parser.add_argument("-v", "--Speed",
                     help="What speed do you want the text to scroll at on the display; default is 3, must be greater than 0.",
                     type=check_positive, default=3)
@@ -57,8 +75,14 @@ parser.add_argument("-d", "--Delay",
                     help="How long the display will pause before starting the next animation; default is 30, must be greater than 0.",
                     type=check_positive, default=30)
 parser.add_argument("-r", "--RecoveryTime",
-                    help="How long the display will wait before attempting to get new data again after previously failing; default is 100, must be greater than 0.",
+                    help="LEGACY - THIS IS NO LONGER USED OR NEEDED, see BackoffBase and BackoffMax",
                     type=check_positive, default=100)
+parser.add_argument("--BackoffBase",
+                    help="How long the display will wait before requesting new data from an API again after it fails, doubling each time it fails again in a row; default is 30(seconds)",
+                    type=check_positive, default=30)
+parser.add_argument("--BackoffMax",
+                    help="The longest the display will wait before requesting new data from an API again after it fails; default is 900(seconds)",
+                    type=check_positive, default=900)
 parser.add_argument("-n", "--NumberOfCards",
                     help="The maximum number of cards you will see before forcing a new data retrieval, a limit is recommend to prevent cycling through data which may become out of data or going too far into scheduled trains; default is 9, must be greater than 0.",
                     type=check_positive, default=9)
@@ -68,7 +92,7 @@ parser.add_argument("-l", "--RequestLimit",
                     help="Defines the minium amount of time the display must wait before making a new data request; default is 55(seconds)",
                     type=check_positive, default=55)
 parser.add_argument("-z", "--StaticUpdateLimit",
-                    help="Defines the amount of time the display will wait before updating the expected arrival time (based upon it's last known predicted arrival time); default is  15(seconds), this should be lower than your 'RequestLimit'",
+                    help="LEGACY - THIS IS NO LONGER USED OR NEEDED, the time shown is updated whenever it changes",
                     type=check_positive, default=15)
 parser.add_argument("-e", "--EnergySaverMode",
                     help="To save screen from burn in and prolong it's life it is recommend to have energy saving mode enabled. 'off' is default, between the hours set the screen will turn off. 'dim' will turn the screen brightness down, but not completely off. 'none' will do nothing and leave the screen on; this is not recommend, you can change your active hours instead.",
@@ -116,6 +140,24 @@ parser.add_argument("--PartialAnimations",
 parser.add_argument("--SortByActual",
                     help="By default services will be displayed in the order of their scheduled departure time. Use this flag to sort by their Actual/Expected departure time if this is known.",
                     dest='SortByActual', action='store_true')
+parser.add_argument("--DetailWorkers",
+                    help="The maximum number of service details requested from the API at the same time when getting new data. 1 requests them one at a time; default is 4, must be greater than 0.",
+                    type=check_positive, default=4)
+parser.add_argument("--FetchMode", default='perservice', choices=['withdetails', 'perservice'],
+                    help="How new data is requested from the API. perservice- gets the board and then each service separately. withdetails- gets the board and every service's calling points in a single request, at most 10 services. If the API does not support withdetails perservice is used instead; default is 'perservice'.")
+parser.add_argument("--DetailCacheTTL",
+                    help="When getting each service separately, how long a service's details are reused for before being requested again, unless its expected time or platform changes; default is 300(seconds)",
+                    type=check_positive, default=300)
+parser.add_argument("--CacheDir",
+                    help="The folder used to keep data between restarts, such as the National Rail API description (WSDL); default is the 'cache' folder next to this program.",
+                    type=str, default="%s/cache" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))))
+parser.add_argument("--Record",
+                    help="Used for development and testing, saves every response from the API into this folder so they can be played back later with '--Replay'.")
+parser.add_argument("--Replay",
+                    help="Used for development and testing, plays back the API responses saved with '--Record' in this folder instead of using the API, so no connection is needed.")
+parser.add_argument("--ReplaySpeed",
+                    help="When replaying, how many times faster than they were recorded the responses are played back, 0 plays each back as soon as it is requested; default is 0.",
+                    type=float, default=0)
 
 # Defines the required paramaters
 requiredNamed = parser.add_argument_group('required named arguments')
@@ -162,6 +204,169 @@ BasicFont = ImageFont.truetype(
     FontSize - 1)
 # Stores the name of the station being displayed.
 StationName = ""
+# Creates the folder used to keep data between restarts.
+os.makedirs(Args.CacheDir, exist_ok=True)
+
+if Args.Record and Args.Replay:
+    print("You can not have both '--Record' and '--Replay' turned on at the same time.")
+    sys.exit()
+
+
+# Saves each API response with the time it was received, or plays them back in the same order, so the board can be run and timed without the API.
+class Recorder():
+    # Parts of a request which are secret, these are not saved and are ignored when matching requests to responses.
+    Secrets = re.compile(rb"<([\w:]*)TokenValue>[^<]*</\1TokenValue>")
+
+    def __init__(self, record, replay, speed):
+        self.record = record
+        self.replay = replay
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.seq = 0
+        # The saved responses not yet played back, by request.
+        self.Responses = {}
+        # When the first response was played back and when it was received, used to play the rest back at the same pace.
+        self.Start = None
+        if record:
+            os.makedirs(record, exist_ok=True)
+        if replay:
+            with open("%s/index.jsonl" % replay) as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.Responses.setdefault(entry["key"], []).append(entry)
+
+    # Returns what a request is saved under, the URL and the SOAP action with a hash of the message without the API token, as the message can be long.
+    @staticmethod
+    def Key(url, action=None, message=None):
+        if message is None:
+            return url
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        return "%s %s %s" % (url, action, hashlib.sha1(Recorder.Secrets.sub(b"", message)).hexdigest())
+
+    # Saves a response in the record folder.
+    def save(self, key, status, headers, body):
+        with self.lock:
+            self.seq += 1
+            fileName = "%06d.bin" % self.seq
+            with open("%s/%s" % (self.record, fileName), "wb") as file:
+                file.write(body)
+            with open("%s/index.jsonl" % self.record, "a") as file:
+                file.write(json.dumps({"seq": self.seq, "time": time.time(), "key": key, "status": status, "headers": list(headers.items()), "file": fileName}) + "\n")
+
+    # Returns the next saved status, headers and body for the request. Once all of them have been played back the last one is repeated.
+    # If a replay speed is given, each is not returned until the same time has passed since the first as when recorded, divided by the speed.
+    def load(self, key):
+        with self.lock:
+            entries = self.Responses.get(key)
+            if not entries:
+                raise Exception("No recorded response for %s" % key)
+            entry = entries.pop(0) if len(entries) > 1 else entries[0]
+            if self.Start is None:
+                self.Start = (time.time(), entry["time"])
+        if self.speed > 0:
+            wait = self.Start[0] + (entry["time"] - self.Start[1]) / self.speed - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+        headers = dict(entry["headers"])
+        with open("%s/%s" % (self.replay, entry["file"]), "rb") as file:
+            return entry["status"], headers, file.read()
+
+Recordings = Recorder(Args.Record, Args.Replay, Args.ReplaySpeed)
+
+
+# The National Rail API transport, which also saves each response if recording or plays them back instead if replaying.
+class RecordingTransport(WellBehavedHttpTransport):
+    # Used to get the API description (WSDL).
+    def open(self, request):
+        key = Recorder.Key(request.url)
+        if Args.Replay:
+            return BytesIO(Recordings.load(key)[2])
+        body = super().open(request).read()
+        if Args.Record:
+            Recordings.save(key, 200, {}, body)
+        return BytesIO(body)
+
+    # Used to make each request to the API.
+    def send(self, request):
+        key = Recorder.Key(request.url, request.headers.get("SOAPAction"), request.message)
+        if Args.Replay:
+            return Reply(*Recordings.load(key))
+        reply = super().send(request)
+        if Args.Record:
+            Recordings.save(key, reply.code, dict(reply.headers), reply.message)
+        return reply
+
+
+# A Darwin session which keeps the parsed National Rail API description (WSDL) on disk, so it is only downloaded once rather than on every start up.
+class CachedDarwinLdbSession(DarwinLdbSession):
+    def __init__(self, wsdl, api_key, timeout=5):
+        self._soap_client = Client(wsdl, transport=RecordingTransport(),
+                                   cache=ObjectCache(location="%s/wsdl" % Args.CacheDir, days=30))
+        self._soap_client.set_options(timeout=timeout)
+        # Builds the soap header containing the API token.
+        token3 = Element("AccessToken", ns=DARWIN_WEBSERVICE_NAMESPACE)
+        token_value = Element("TokenValue", ns=DARWIN_WEBSERVICE_NAMESPACE)
+        token_value.setText(api_key)
+        token3.append(token_value)
+        self._soap_client.set_options(soapheaders=(token3))
+
+
+# Keeps the most recently requested service details, so a service is only requested again once its expected time or platform on the board changes or it has been kept for longer than 'DetailCacheTTL'.
+class ServiceDetailsCache():
+    def __init__(self, maxSize, ttl):
+        self.entries = OrderedDict()
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    # The parts of a service on the board which mean its details need requesting again if they change.
+    @staticmethod
+    def signature(serviceC):
+        return (serviceC.etd, serviceC.eta, serviceC.platform)
+
+    # Returns the kept details for the service, or None if they need requesting.
+    def get(self, serviceC):
+        entry = self.entries.get(serviceC.service_id)
+        if entry is not None and entry[0] == self.signature(serviceC) and time.time() - entry[1] < self.ttl:
+            self.entries.move_to_end(serviceC.service_id)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put(self, serviceC, service):
+        now = time.time()
+        self.entries[serviceC.service_id] = (self.signature(serviceC), now, service)
+        self.entries.move_to_end(serviceC.service_id)
+        # Removes anything which has expired, then the oldest entries if there are still too many.
+        for service_id in [key for key, entry in self.entries.items() if now - entry[1] >= self.ttl]:
+            del self.entries[service_id]
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+
+# A service on a board which already includes the stations it will be calling at.
+class ServiceItemWithCallingPoints(ServiceItemWithDetails):
+    @property
+    def subsequent_calling_points(self):
+        calling_points = list()
+        for cpl in self.subsequent_calling_point_lists:
+            calling_points += cpl.calling_points
+        return calling_points
+
+
+# A station board where every service includes its calling points, returned by the API in a single request.
+class StationBoardWithDetails(StationBoard):
+    def __init__(self, soap_response):
+        super(StationBoardWithDetails, self).__init__(soap_response)
+        try:
+            service_rows = soap_response.trainServices.service
+        except AttributeError:
+            service_rows = []
+        self._train_services = [ServiceItemWithCallingPoints(s) for s in service_rows]
 
 
 ###
@@ -177,6 +382,7 @@ class LiveTimeStud():
         self.DisplayTime = " "
         self.CallingAt = " "
         self.Platfrom = " "
+        self.Platform = " "
         self.ID = " "
         self.Operator = " "
         self.IsCancelled = " "
@@ -184,14 +390,83 @@ class LiveTimeStud():
         self.DisplayText = " "
         self.ID = "0"
 
-    def TimePassedStatic(self):
-        return False
+
+# The times of a service, converted once when the data is retrieved instead of every time they are shown. Every time is in seconds since the epoch.
+class Departure():
+    __slots__ = ("Scheduled", "Expected")
+    # The time zone the API gives local times in. Its offset from UTC and when its last midnight was are worked out by Refresh().
+    Zone = ZoneInfo(Args.TimeZone)
+    Offset = 0
+    Midnight = 0
+
+    def __init__(self, Scheduled, Expected):
+        self.Scheduled = Scheduled
+        # The predicted time, None if it is not known.
+        self.Expected = Expected
+
+    # Returns the predicted time if known, else the time tabled time.
+    def Best(self):
+        return self.Scheduled if self.Expected is None else self.Expected
+
+    # Returns how many minutes until the service is due, negative once it should have already gone.
+    def MinutesUntil(self):
+        return (self.Best() - time.time()) / 60
+
+    # Returns when a count down to the time next changes, in seconds since the epoch: when it comes within 'Limit' minutes, then as each
+    # whole minute passes until it is within 'Due' minutes, where it stays the same. Returns None once it will not change again.
+    def NextChange(self, Due, Limit):
+        Seconds = self.Best()
+        left = Seconds - time.time()
+        if left <= Due * 60:
+            return None
+        if left >= Limit * 60:
+            return Seconds - Limit * 60
+        return Seconds - int(left // 60) * 60
+
+    # Works out the time zone's offset from UTC, and when its last midnight was, once each time new data is retrieved instead of for every time converted.
+    @staticmethod
+    def Refresh():
+        now = int(time.time())
+        Departure.Offset = int(datetime.fromtimestamp(now, Departure.Zone).utcoffset().total_seconds())
+        Departure.Midnight = (now + Departure.Offset) // 86400 * 86400 - Departure.Offset
+
+    # Converts a time of day ("HH:MM") to seconds since the epoch, or None if it is not a time. Times are given without a date,
+    # so the one closest to now is used, which is tomorrow for times just after midnight or yesterday for those just before.
+    @staticmethod
+    def FromClock(Text):
+        if not Text or len(Text) != 5 or Text[2] != ':' or not Text[:2].isdigit() or not Text[3:].isdigit():
+            return None
+        moment = Departure.Midnight + int(Text[:2]) * 3600 + int(Text[3:]) * 60
+        now = time.time()
+        if moment - now < -12 * 3600:
+            moment += 86400
+        elif moment - now > 12 * 3600:
+            moment -= 86400
+        return moment
+
+    # Returns a time in seconds since the epoch as shown on the display, in the time zone.
+    @staticmethod
+    def Clock(Seconds):
+        return time.strftime("%H:%M" if (Args.TimeFormat==24) else "%I:%M", time.gmtime(Seconds + Departure.Offset))
 
 
 # Used to get live data from the National Rail API and represent a specific services and it's details.
 class LiveTime(object):
     # The last time an API call was made to get new data.
     LastUpdate = datetime.now()
+    # How a service can have changed from one lot of data to the next, as far as what is shown on the display.
+    ServiceChanges = ["unchanged", "time-changed", "index-changed", "platform-changed", "new", "departed"]
+    # The session used to talk to the National Rail API, kept for the life of the program and only rebuilt after the API reports a fault.
+    Session = None
+    # The sessions used by the workers requesting service details at the same time, as a suds client can not be shared between threads.
+    # Each is taken by one worker at a time and put back when it is done, so they are kept between refreshes.
+    DetailSessions = queue.Queue()
+    # The service details already requested, to save requesting them again.
+    DetailsCache = ServiceDetailsCache(64, Args.DetailCacheTTL)
+    # The most services the API returns when getting the board with details.
+    MaxRowsWithDetails = 10
+    # False once the API has been found not to support getting the board with details, so it is not asked again.
+    WithDetailsSupported = True
 
     # * Change this method to implement your own API *
     def __init__(self, Data, Index, serviceC):
@@ -200,6 +475,14 @@ class LiveTime(object):
         self.SchArrival = self.GetArrivalTime(Data)
         # The text displayed showing the status of the train, ie, "On time", "Canceled" or "XX:XX"
         self.ExptArrival = self.GetExpectedArrivalTime(Data)
+        # The times converted once, so they are not converted again each time they are shown. "On time" is the scheduled time, other statuses have no time.
+        Scheduled = Departure.FromClock(self.SchArrival)
+        self.Times = Departure(Scheduled, Scheduled if self.ExptArrival == 'On time' else Departure.FromClock(self.ExptArrival))
+        # When the train leaves, which is what decides if it has gone. Trains which terminate here only have arrival times.
+        SchDeparture = str(Data.std) if Data.std is not None else self.SchArrival
+        ExptDeparture = str(Data.etd) if Data.etd is not None else self.ExptArrival
+        Leaves = Departure.FromClock(SchDeparture)
+        self.Leaves = Departure(Leaves, Leaves if ExptDeparture == 'On time' else Departure.FromClock(ExptDeparture))
         self.DisplayTime = self.GetExptTime()
         # The text displayed showing where the train will be stopping at along the way.
         self.CallingAt = str([cp.location_name for cp in Data.subsequent_calling_points]).replace(']', '').replace('[',
@@ -238,9 +521,7 @@ class LiveTime(object):
         if Args.ShowIndex:
             msg += self.Index + ' '
         if Args.Design == 'full':
-            msg += datetime.strptime(str(datetime.now().date()) + " " + self.SchArrival,
-                                     '%Y-%m-%d %H:%M').time().strftime(
-                "%H:%M" if (Args.TimeFormat == 24) else "%I:%M") + ' '
+            msg += Departure.Clock(self.Times.Scheduled) + ' '
         if not Args.HidePlatform:
             msg += self.Platform
             msg += ' ' * (4 - len(self.Platform))
@@ -249,71 +530,171 @@ class LiveTime(object):
 
     # Returns the string to display for the predicted arrival text box
     def GetExptTime(self):
-        self.LastStaticUpdate = datetime.now()
-
         if Args.Design == 'full':
-            if re.search('[a-zA-Z]', self.ExptArrival):
+            if re.search('[a-zA-Z]', self.ExptArrival) or self.Times.Expected is None:
                 return self.ExptArrival
             else:
-                return datetime.strptime(str(datetime.now().date()) + " " + self.ExptArrival,
-                                         '%Y-%m-%d %H:%M').time().strftime(
-                    "%H:%M" if (Args.TimeFormat == 24) else "%I:%M")
+                return Departure.Clock(self.Times.Expected)
         else:
-            if re.search('[a-zA-Z]', self.ExptArrival) and self.ExptArrival != 'On time':
+            if self.Times.Expected is None:
                 return self.ExptArrival
 
-            ExpTime = self.ExptArrival
-            if self.ExptArrival == 'On time':
-                ExpTime = self.SchArrival
-            try:
-                Diff = (datetime.strptime(ExpTime, "%H:%M").replace(year=datetime.now().year,
-                                                                    month=datetime.now().month,
-                                                                    day=datetime.now().day) - datetime.now()).total_seconds() / 60
-                if Diff <= 1:
-                    return ' Arriving'
-                if Diff >= 15:
-                    return ExpTime
-                return ' %d min' % Diff
-            except Exception as e:
-                print("GetExptTime() ERROR")
-                print(str(e))
-                return ExpTime
+            Diff = self.Times.MinutesUntil()
+            if Diff <= 1:
+                return ' Arriving'
+            if Diff >= 15:
+                return Departure.Clock(self.Times.Expected)
+            return ' %d min' % Diff
+
+    # Compares a service with the same service from newer data, returning what has changed of what is shown on the display.
+    # Any change other than the time, platform or index means the whole card has to be drawn again, so is treated as a new service.
+    @staticmethod
+    def ClassifyService(old, new):
+        if old is None:
+            return "new"
+        if new is None:
+            return "departed"
+        if (old.Destination, old.CallingAt) != (new.Destination, new.CallingAt):
+            return "new"
+        if old.Platform != new.Platform:
+            return "platform-changed"
+        # The index is shown next to the platform, so a service which has only moved in the list is drawn again in place.
+        if old.DisplayText != new.DisplayText:
+            return "index-changed"
+        if old.DisplayTime != new.DisplayTime:
+            return "time-changed"
+        return "unchanged"
+
+    # Compares the last and newest services, returning how each has changed by ID, including those no longer given as departed.
+    @staticmethod
+    def DiffServices(old, new):
+        previous = {service.ID: service for service in old}
+        changes = {service.ID: LiveTime.ClassifyService(previous.get(service.ID), service) for service in new}
+        for ID in previous:
+            if ID not in changes:
+                changes[ID] = "departed"
+        return changes
+
+    # Returns true if the train is expected to have already left, going by its departure time. Trains given as "Delayed" or "Cancelled" have no time, so are kept.
+    def HasDeparted(self):
+        return self.Leaves.Expected is not None and self.Leaves.MinutesUntil() < 0
 
     # Returns true or false dependent upon if the last time an API data call was made was over the request limit; to prevent spamming the API feed.
     @staticmethod
     def TimePassed():
         return (datetime.now() - LiveTime.LastUpdate).total_seconds() > Args.RequestLimit
 
-    # Return true or false dependent upon if the last time the display was updated was over the static update limit. This prevents updating the display to frequently to increase performance.
-    def TimePassedStatic(self):
-        return ("min" in self.ExptArrival) and (
-                    datetime.now() - self.LastStaticUpdate).total_seconds() > Args.StaticUpdateLimit
+    # Returns when the time shown for the train next changes, in seconds since the epoch, or None if it will not change again.
+    # Only the count down in the compact design changes, the full design shows the time itself.
+    def NextLabelChange(self):
+        if Args.Design == 'full' or self.Times.Expected is None:
+            return None
+        return self.Times.NextChange(1, 15)
 
     @staticmethod
     def sort_key(train):
-        def convert_to_datetime(time_str):
+        real_departure = Departure.FromClock(train.etd if train.etd is not None else train.eta)
+        scheduled_departure = Departure.FromClock(train.std if train.std is not None else train.sta)
+
+        return (real_departure if real_departure is not None else (scheduled_departure or 0))
+
+    # Gets the service details for each of the services given, in the same order, requesting up to 'DetailWorkers' at the same time.
+    # Details which are already known are reused instead of being requested again.
+    # Returns a list of (details, seconds taken to get them) pairs.
+    @staticmethod
+    def GetServiceDetails(darwin_sesh, serviceList):
+        def fetch(serviceC):
+            start = time.time()
+            service = darwin_sesh.get_service_details(serviceC.service_id)
+            return service, time.time() - start
+
+        def fetchWithOwnSession(serviceC):
+            session = LiveTime.DetailSessions.get()
             try:
-                return datetime.strptime(time_str, "%H:%M")
-            except (ValueError, TypeError):
-                return None
+                start = time.time()
+                service = session.get_service_details(serviceC.service_id)
+                return service, time.time() - start
+            finally:
+                LiveTime.DetailSessions.put(session)
+
+        results = []
+        missing = []
+        for serviceC in serviceList:
+            service = LiveTime.DetailsCache.get(serviceC)
+            if service is None:
+                missing.append(serviceC)
+            results.append((service, 0))
+
+        if Args.DetailWorkers == 1 or len(missing) <= 1:
+            fetched = [fetch(serviceC) for serviceC in missing]
+        else:
+            workers = min(Args.DetailWorkers, len(missing))
+            # No worker is running yet, so the count of sessions is exact.
+            while LiveTime.DetailSessions.qsize() < workers:
+                LiveTime.DetailSessions.put(LiveTime.NewSession())
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = list(executor.map(fetchWithOwnSession, missing))
+
+        fetched = iter(fetched)
+        for i, serviceC in enumerate(serviceList):
+            if results[i][0] is None:
+                results[i] = next(fetched)
+                LiveTime.DetailsCache.put(serviceC, results[i][0])
+        return results
+
+    # Returns a new session to talk to the National Rail API.
+    @staticmethod
+    def NewSession():
+        return CachedDarwinLdbSession(wsdl="https://lite.realtime.nationalrail.co.uk/OpenLDBWS/wsdl.aspx", api_key=Args.APIToken)
 
-        real_departure = convert_to_datetime(train.etd) if train.etd is not None else convert_to_datetime(train.eta)
-        scheduled_departure = convert_to_datetime(train.std) if train.std is not None else convert_to_datetime(
-            train.sta)
+    # Returns the session used to talk to the National Rail API, creating it if there is not one already.
+    @staticmethod
+    def GetSession():
+        if LiveTime.Session is None:
+            LiveTime.Session = LiveTime.NewSession()
+        return LiveTime.Session
 
-        return (real_departure if real_departure is not None else scheduled_departure)
+    # Gets the departure board with the calling points for every service in a single request.
+    # Only as many services as there are cards are asked for, unless some may be excluded by platform; the API returns at most 10.
+    @staticmethod
+    def GetBoardWithDetails(darwin_sesh):
+        query = darwin_sesh._soap_client.service["LDBServiceSoap"]["GetDepBoardWithDetails"]
+        numRows = LiveTime.MaxRowsWithDetails if Args.ExcludedPlatforms else min(Args.NumberOfCards, LiveTime.MaxRowsWithDetails)
+        try:
+            soap_response = query(crs=Args.StationID, numRows=numRows)
+        except WebFault:
+            raise WebServiceError
+        return StationBoardWithDetails(soap_response)
 
     # Calls the API and gets the data from it, returning a list of LiveTime objects to be used in the program.
     # * Change this method to implement your own API *
     @staticmethod
     def GetData():
         LiveTime.LastUpdate = datetime.now()
+        Departure.Refresh()
         services = []
 
+        refreshStart = time.time()
+        breaker = CircuitBreaker.For("National Rail")
+        if not breaker.allow():
+            return None
+
         try:
-            darwin_sesh = DarwinLdbSession(wsdl="https://lite.realtime.nationalrail.co.uk/OpenLDBWS/wsdl.aspx",
-                                           api_key=Args.APIToken)
-            board = darwin_sesh.get_station_board(Args.StationID)
+            darwin_sesh = LiveTime.GetSession()
+            board = None
+            if Args.FetchMode == 'withdetails' and LiveTime.WithDetailsSupported:
+                # Only fall back when the API rejects the request; any other error, such as the connection failing, would fail the same way again.
+                try:
+                    board = LiveTime.GetBoardWithDetails(darwin_sesh)
+                except MethodNotFound as e:
+                    LiveTime.WithDetailsSupported = False
+                    print("GetData() ERROR - The API does not support getting the board with details, getting each service separately from now on.")
+                    print(str(e))
+                except WebServiceError as e:
+                    print("GetData() ERROR - Unable to get the board with details, getting each service separately instead.")
+                    print(str(e))
+            if board is None:
+                board = darwin_sesh.get_station_board(Args.StationID)
             global StationName
             StationName = board.location_name
 
@@ -323,18 +704,49 @@ class LiveTime(object):
             else:
                 sorted_train_list = board.train_services
 
-            for serviceC in sorted_train_list:
-                if len(services) >= Args.NumberOfCards:
-                    break
-                service = darwin_sesh.get_service_details(serviceC.service_id)
-                if (service.sta != None or service.std != None) and str(service.platform) not in Args.ExcludedPlatforms:
-                    services.append(LiveTime(service, len(services) + 1, serviceC))
-
+            # The board already has the details for every service, so no more requests are needed.
+            if isinstance(board, StationBoardWithDetails):
+                for serviceC in sorted_train_list:
+                    if len(services) >= Args.NumberOfCards:
+                        break
+                    if (serviceC.sta != None or serviceC.std != None) and str(serviceC.platform) not in Args.ExcludedPlatforms:
+                        services.append(LiveTime(serviceC, len(services) + 1, serviceC))
+
+                print_safe("Refresh took %.2fs using a single request" % (time.time() - refreshStart))
+                breaker.success()
+                return services
+
+            # Request the details for only as many services as cards are still needed, repeating if any are excluded, so the board order is the same as requesting them one at a time.
+            position = 0
+            detailTime = 0
+            detailCount = 0
+            while len(services) < Args.NumberOfCards and position < len(sorted_train_list):
+                batch = sorted_train_list[position:position + Args.NumberOfCards - len(services)]
+                position += len(batch)
+                for serviceC, (service, took) in zip(batch, LiveTime.GetServiceDetails(darwin_sesh, batch)):
+                    detailTime += took
+                    detailCount += 1 if took else 0
+                    if (service.sta != None or service.std != None) and str(service.platform) not in Args.ExcludedPlatforms:
+                        services.append(LiveTime(service, len(services) + 1, serviceC))
+
+            print_safe("Refresh took %.2fs, %d service details took %.2fs added up across every request (%d workers)" % (
+                time.time() - refreshStart, detailCount, detailTime, Args.DetailWorkers))
+            print_safe("Service details cache: %d hits, %d misses" % (LiveTime.DetailsCache.hits, LiveTime.DetailsCache.misses))
+            breaker.success()
             return services
+        except WebServiceError as e:
+            breaker.failure()
+            # The sessions may no longer be valid, so start new ones next time.
+            LiveTime.Session = None
+            LiveTime.DetailSessions = queue.Queue()
+            print("GetData() ERROR - National Rail API fault")
+            print(str(e))
+            return None
         except Exception as e:
+            breaker.failure()
             print("GetData() ERROR")
             print(str(e))
-            return []
+            return None
 
 
 ###
@@ -354,6 +766,27 @@ class TextImage():
         del draw
 
 
+# Keeps the images of the times shown on the board, so each is only drawn once rather than every time it changes.
+# Every count down label is drawn when the display starts, any other (such as 'HH:MM') the first time it is shown.
+class LabelAtlas():
+    # How many labels drawn when first shown are kept before they are all forgotten, so a board left running does not keep every time of day.
+    Limit = 256
+
+    def __init__(self, device, labels):
+        self.device = device
+        self.Labels = dict((label, TextImage(device, label)) for label in labels)
+        self.Shown = {}
+
+    # Returns the image of the label, only drawing it if it has not been already.
+    def get(self, label):
+        image = self.Labels.get(label) or self.Shown.get(label)
+        if image is None:
+            if len(self.Shown) >= self.Limit:
+                self.Shown.clear()
+            image = self.Shown[label] = TextImage(self.device, label)
+        return image
+
+
 # Used to create the time on the board or any other basic text box.
 class VariableTextImage():
     def __init__(self, device, text, sizeAllowed):
@@ -404,22 +837,22 @@ class StaticTextImage():
         self.image = Image.new(device.mode, (device.width, FontSize * 2))
         draw = ImageDraw.Draw(self.image)
 
-        displayTimeTemp = TextImage(device, service.DisplayTime)
+        displayTimeTemp = Labels.get(service.DisplayTime)
         displayInfoTemp = TextImage(device, service.DisplayText)
         sizeRemaining = device.width - (displayTimeTemp.width + displayInfoTemp.width)
 
+        # The times are copied from the label atlas rather than drawn, before the rest of the text is drawn over them.
+        self.image.paste(displayTimeTemp.image, (device.width - displayTimeTemp.width, FontSize))
         draw.text((0, FontSize), service.DisplayText, font=BasicFont, fill="white")
-        draw.text((device.width - displayTimeTemp.width, FontSize), service.DisplayTime, font=BasicFont, fill="white")
         draw.text((displayInfoTemp.width, FontSize), service.Destination,
                   font=VariableTextImage.generateFont(service.Destination, sizeRemaining), fill="white")
 
-        displayTimeTempPrev = TextImage(device, previous_service.DisplayTime)
+        displayTimeTempPrev = Labels.get(previous_service.DisplayTime)
         displayInfoTempPrev = TextImage(device, previous_service.DisplayText)
         sizeRemainingPrev = device.width - (displayTimeTempPrev.width + displayInfoTempPrev.width)
 
+        self.image.paste(displayTimeTempPrev.image, (device.width - displayTimeTempPrev.width, 0))
         draw.text((0, 0), previous_service.DisplayText, font=BasicFont, fill="white")
-        draw.text((device.width - displayTimeTempPrev.width, 0), previous_service.DisplayTime, font=BasicFont,
-                  fill="white")
         draw.text((displayInfoTempPrev.width, 0), previous_service.Destination,
                   font=VariableTextImage.generateFont(previous_service.Destination, sizeRemainingPrev), fill="white")
 
@@ -500,6 +933,9 @@ class ScrollTime():
 
     STUD = -1
 
+    # The number of images which have not needed drawing again since it was last reset, as what they show had not changed.
+    RendersAvoided = 0
+
     def __init__(self, image_composition, service, previous_service, scroll_delay, synchroniser, device, position,
                  controller):
         self.speed = Args.Speed
@@ -529,10 +965,13 @@ class ScrollTime():
         self.synchroniser = synchroniser
         self.render()
         self.synchroniser.ready(self)
+        # Set by the countdown scheduler when the time shown is due to change.
+        self.LabelDue = False
+        Countdown.schedule(self)
 
     # Generates all the Images (Text boxes) to be drawn on the display.
     def generateCard(self, service):
-        displayTimeTemp = TextImage(device, service.DisplayTime)
+        displayTimeTemp = Labels.get(service.DisplayTime)
         displayInfoTemp = TextImage(device, service.DisplayText)
 
         sizeRemaining = device.width - (displayTimeTemp.width + displayInfoTemp.width)
@@ -543,6 +982,9 @@ class ScrollTime():
                                            position=(displayInfoTemp.width, Offset + (FontSize * self.position)))
         self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(
         device.width - displayTimeTemp.width, Offset + (FontSize * self.position)))
+        # Kept so the destination can be fitted between them again without drawing them again.
+        self.DisplayTextWidth = displayInfoTemp.width
+        self.DisplayTimeWidth = displayTimeTemp.width
 
         TempSCallingAt = TextImage(device, "Calling at:")
         TempICallingAt = LongTextImage(device, service.CallingAt)
@@ -556,24 +998,43 @@ class ScrollTime():
 
     # Called when you have new/updated information from an API call and want to update the objects predicted arrival time.
     def updateCard(self, newService, device):
+        change = LiveTime.ClassifyService(self.CurrentService, newService)
+        if change == "new":
+            self.changeCard(newService, device)
+            return
         self.state = self.SCROLL_DECIDER
         self.synchroniser.ready(self)
-        self.image_composition.remove_image(self.IDisplayTime)
+        oldService = self.CurrentService
+        self.CurrentService = newService
+        Countdown.schedule(self)
+        # Only draw again what has changed. The destination fills the space between the platform and the time, so is drawn again if either are.
+        if change == "unchanged":
+            ScrollTime.RendersAvoided += 3
+            return
         self.image_composition.remove_image(self.IDestintion)
 
-        displayTimeTemp = TextImage(device, newService.DisplayTime)
-        self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(
-        device.width - displayTimeTemp.width, Offset + (FontSize * self.position)))
+        if newService.DisplayTime != oldService.DisplayTime:
+            self.image_composition.remove_image(self.IDisplayTime)
+            displayTimeTemp = Labels.get(newService.DisplayTime)
+            self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(
+            device.width - displayTimeTemp.width, Offset + (FontSize * self.position)))
+            self.DisplayTimeWidth = displayTimeTemp.width
+            self.image_composition.add_image(self.IDisplayTime)
 
-        tempDisplayText = TextImage(device, newService.DisplayText)
-        sizeRemaining = device.width - (displayTimeTemp.width + tempDisplayText.width)
+        if change in ("platform-changed", "index-changed"):
+            self.image_composition.remove_image(self.IDisplayText)
+            displayInfoTemp = TextImage(device, newService.DisplayText)
+            self.IDisplayText = ComposableImage(displayInfoTemp.image, position=(0, Offset + (FontSize * self.position)))
+            self.DisplayTextWidth = displayInfoTemp.width
+            self.image_composition.add_image(self.IDisplayText)
+        else:
+            ScrollTime.RendersAvoided += 1
 
+        sizeRemaining = device.width - (self.DisplayTimeWidth + self.DisplayTextWidth)
         displayDestinationTemp = VariableTextImage(device, newService.Destination, sizeRemaining)
         self.IDestintion = ComposableImage(displayDestinationTemp.image,
-                                           position=(tempDisplayText.width, Offset + (FontSize * self.position)))
-
+                                           position=(self.DisplayTextWidth, Offset + (FontSize * self.position)))
         self.image_composition.add_image(self.IDestintion)
-        self.image_composition.add_image(self.IDisplayTime)
         self.image_composition.refresh()
 
     # Called when you want to change the row from one service to another.
@@ -605,6 +1066,7 @@ class ScrollTime():
 
         self.generateCard(newService)
         self.CurrentService = newService
+        Countdown.schedule(self)
 
         self.state = self.WAIT_STUD if (newService.ID == "0") else self.WAIT_OPENING
 
@@ -630,16 +1092,26 @@ class ScrollTime():
 
     # Called upon each time you want to get the next frame for the display.
     def tick(self):
-        #Update X min till arrival.
-        if self.CurrentService.TimePassedStatic() and (
-                self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
-            self.image_composition.remove_image(self.IDisplayTime)
-            self.CurrentService.DisplayTime = self.CurrentService.GetExptTime()
-            displayTimeTemp = TextImage(device, self.CurrentService.DisplayTime)
-            self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(
-            device.width - displayTimeTemp.width, Offset + (FontSize * self.position)))
-            self.image_composition.add_image(self.IDisplayTime)
-            self.image_composition.refresh()
+        #Update X min till arrival, once the countdown scheduler has woken the row as it is due to change.
+        if self.LabelDue and (self.state == self.SCROLL_DECIDER or self.state == self.SCROLLING_WAIT or self.state == self.SCROLLING or self.state == self.WAIT_SYNC):
+            self.LabelDue = False
+            DisplayTime = self.CurrentService.GetExptTime()
+            # The time shown only needs drawing again if it has changed.
+            if DisplayTime == self.CurrentService.DisplayTime:
+                ScrollTime.RendersAvoided += 1
+            else:
+                self.CurrentService.DisplayTime = DisplayTime
+                # While the calling at points scroll the time is hidden, so it is only swapped, to be shown again when scrolling ends.
+                scrolling = self.state == self.SCROLLING
+                if not scrolling:
+                    self.image_composition.remove_image(self.IDisplayTime)
+                displayTimeTemp = Labels.get(self.CurrentService.DisplayTime)
+                self.IDisplayTime = ComposableImage(displayTimeTemp.image, position=(
+                device.width - displayTimeTemp.width, Offset + (FontSize * self.position)))
+                if not scrolling:
+                    self.image_composition.add_image(self.IDisplayTime)
+                    self.image_composition.refresh()
+            Countdown.schedule(self)
 
         if self.state == self.WAIT_OPENING:
             if not self.is_waiting():
@@ -769,13 +1241,189 @@ class ScrollTime():
         return True
 
 
+###
+## Circuit Breaker
+## Stops requesting new data from an API endpoint which keeps failing, waiting longer after each failure before trying it again.
+###
+class CircuitBreaker():
+    # Every endpoint's circuit breaker, by name.
+    Breakers = {}
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        # closed- requests are made as normal. open- no requests are made until OpenUntil. half-open- one trial request is being made.
+        self.State = "closed"
+        self.failures = 0
+        self.OpenUntil = 0
+
+    # Returns the circuit breaker for the endpoint, creating it the first time.
+    @staticmethod
+    def For(name):
+        if name not in CircuitBreaker.Breakers:
+            CircuitBreaker.Breakers[name] = CircuitBreaker(name)
+        return CircuitBreaker.Breakers[name]
+
+    # Returns true if any endpoint may be requested now, so there is a point in asking for new data.
+    @staticmethod
+    def Ready():
+        now = time.time()
+        return not CircuitBreaker.Breakers or any(breaker.State == "closed" or (breaker.State == "open" and now >= breaker.OpenUntil) for breaker in CircuitBreaker.Breakers.values())
+
+    # Returns true if a request may be made to the endpoint now. Once the wait is over a single trial request is let through.
+    def allow(self):
+        with self.lock:
+            if self.State == "closed":
+                return True
+            if self.State == "open" and time.time() >= self.OpenUntil:
+                self.setState("half-open", "trying again")
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            if self.State != "closed":
+                self.setState("closed", "working again")
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            # The wait doubles with each failure in a row, up to the maximum. Half of it is random so many displays do not all try again at once.
+            backoff = min(Args.BackoffMax, Args.BackoffBase * 2 ** min(self.failures - 1, 20))
+            wait = backoff / 2 + random.uniform(0, backoff / 2)
+            self.OpenUntil = time.time() + wait
+            self.setState("open", "%d failures in a row, trying again in %ds" % (self.failures, wait))
+
+    def setState(self, state, reason):
+        self.State = state
+        print_safe("Circuit breaker for %s is %s - %s" % (self.name, state, reason))
+
+
+###
+## Departure Store
+## Keeps the last services retrieved, so the board carries on showing them while new data cannot be retrieved instead of showing "No Services".
+###
+class DepartureStore():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.Services = []
+        # True when new data could not be retrieved, so the services are from an earlier request.
+        self.Stale = False
+        self.Updated = datetime.now()
+
+    # Keeps newly retrieved services, or if they could not be retrieved (None) marks the last ones as stale. Returns the services to show.
+    def update(self, services):
+        with self.lock:
+            if services is not None:
+                if self.Stale:
+                    print_safe("New data retrieved, no longer showing the services from %s" % self.Updated.time())
+                self.Services = services
+                self.Stale = False
+                self.Updated = datetime.now()
+            elif self.Services and not self.Stale:
+                print_safe("Unable to get new data, showing the services from %s until it can be" % self.Updated.time())
+                self.Stale = True
+            return self.prune()
+
+    # Returns the services to show, dropping any which have departed since they were retrieved if they are stale.
+    def current(self):
+        with self.lock:
+            return self.prune()
+
+    # Only stale services are pruned. Fresh data is shown as the API gives it, as a service it still lists has not gone yet.
+    def prune(self):
+        if self.Stale:
+            self.Services = [service for service in self.Services if not service.HasDeparted()]
+        return self.Services
+
+
+###
+## Data Refresher
+## Gets new data in the background, so the display keeps animating while it waits for the API.
+###
+class DataRefresher():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wanted = threading.Event()
+        # Set each time a request has finished.
+        self.done = threading.Event()
+        self.Services = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Asks for new data to be retrieved, if it is not already being retrieved.
+    def request(self):
+        self.wanted.set()
+
+    # Asks for new data and waits until it has been retrieved, returning it. Only used before the board is first drawn, as there is nothing to show until then.
+    def fetch(self):
+        self.done.clear()
+        self.request()
+        self.done.wait()
+        return self.collect()
+
+    # Returns the newest finished list of services since it was last collected, or None if there is not one yet.
+    def collect(self):
+        with self.lock:
+            services = self.Services
+            self.Services = None
+        return services
+
+    def run(self):
+        while True:
+            self.wanted.wait()
+            self.wanted.clear()
+            services = Departures.update(LiveTime.GetData())
+            with self.lock:
+                self.Services = services
+            self.done.set()
+
+
+###
+## Countdown Scheduler
+## Works out when the time shown on each row will next change, so rows are only woken to update it then instead of checking every frame.
+###
+class CountdownScheduler():
+    # How long after the time shown is due to change to wake the row, as each time is still shown up to and including that moment.
+    Margin = 0.05
+
+    def __init__(self):
+        # The rows to wake, as (time to wake, order added, row, service it was showing).
+        self.heap = []
+        self.added = 0
+
+    # Schedules the row to be woken when the time shown for its service next changes.
+    def schedule(self, row):
+        service = row.CurrentService
+        if service.ID == "0":
+            return
+        # The time shown may already be out of date, if the data was retrieved a while before the row came to show it.
+        when = time.time() if service.GetExptTime() != service.DisplayTime else service.NextLabelChange()
+        if when is not None:
+            self.added += 1
+            heapq.heappush(self.heap, (when + self.Margin, self.added, row, service))
+
+    # Called every frame, wakes every row whose time shown is due to change. Otherwise only the soonest is looked at.
+    def tick(self):
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            when, added, row, service = heapq.heappop(self.heap)
+            # A row which has moved on to another service has already been scheduled again for it.
+            if row.CurrentService is service:
+                row.LabelDue = True
+
+
 ###
 ## Board Controller
 ## Defines the board which controls what each off the rows in the display will show at any time.
 ###
 class boardFixed():
     def __init__(self, image_composition, scroll_delay, device):
-        self.Services = LiveTime.GetData()
+        # Every request is made by the refresher, so the board is built from the services it last retrieved. New data is asked for if it is due.
+        self.Services = Departures.current()
+        if LiveTime.TimePassed() and CircuitBreaker.Ready():
+            Refresher.request()
         self.synchroniser = Synchroniser()
         self.scroll_delay = scroll_delay
         self.image_composition = image_composition
@@ -803,13 +1451,16 @@ class boardFixed():
 
     # Called upon every time a new frame is needed.
     def tick(self):
+        Countdown.tick()
         #If no data can be found.
         if len(self.Services) == 0:
             if self.ticks == 0:
                 self.image_composition.add_image(self.NoServices)
 
-            #Wait a period of time then try getting new data again.
+            #Wait a period of time then ask for new data again in the background, building the board again once it has been retrieved.
             if not self.is_waiting():
+                Refresher.request()
+            if Refresher.collect() is not None:
                 self.top.delete()
                 del self.top
                 self.middel.delete()
@@ -824,14 +1475,30 @@ class boardFixed():
             self.middel.tick()
             self.bottom.tick()
 
+    # Logs how the services have changed since data was last retrieved, and how many images have not needed drawing again since.
+    def logChanges(self, services):
+        changes = list(LiveTime.DiffServices(self.Services, services).values())
+        print_safe("Services: %s - %d re-renders avoided since the last refresh" % (", ".join("%d %s" % (changes.count(change), change) for change in LiveTime.ServiceChanges), ScrollTime.RendersAvoided))
+        ScrollTime.RendersAvoided = 0
+
     # Called when a row has completed one cycle of it's states and requests to change card, here the program decides what to do.
     def requestCardChange(self, card, row):
-        # If it has cycled through all cards, cycle from start again, unless enough time has passed for a new API request.
+        # Ask for new data in the background once enough time has passed, so it is ready by the end of the cycle.
+        if LiveTime.TimePassed() and CircuitBreaker.Ready():
+            Refresher.request()
+
+        # If it has cycled through all cards, cycle from start again, using any new data which has been retrieved.
         if (self.x > Args.NumberOfCards or self.x > len(self.Services) - 1):
             self.x = 1 if Args.FixToArrive else 0
-            if LiveTime.TimePassed():
-                self.Services = LiveTime.GetData()
-                print_safe("New Data Retrieved %s" % datetime.now().time())
+            # Swap in the newest data once it has been retrieved in the background.
+            services = Refresher.collect()
+            if services is not None:
+                self.logChanges(services)
+                self.Services = services
+                if not Departures.Stale:
+                    print_safe("New Data Retrieved %s" % datetime.now().time())
+            elif Departures.Stale:
+                self.Services = Departures.current()
 
         # If there are more rows (3) than there is services scheduled show nothing.
         if row > len(self.Services):
@@ -860,10 +1527,10 @@ class boardFixed():
         if not (Args.FixToArrive and row == 1):
             self.x = self.x + 1
 
-    # Used to add a time delay if there was an error with the last API request (providing a back off and wait mechanism)
+    # Keeps the board waiting, without being rebuilt, until new data may be requested again and an API's circuit breaker lets a request through.
     def is_waiting(self):
         self.ticks += 1
-        if self.ticks > Args.RecoveryTime:
+        if LiveTime.TimePassed() and CircuitBreaker.Ready():
             self.ticks = 0
             return False
         return True
@@ -916,6 +1583,16 @@ if Args.Display == 'gifanim':
     device._max_frames = int(Args.maxframes)
 
 image_composition = ImageComposition(device)
+# Every count down or status the board's design can show, drawn once now rather than each time a row changes to it.
+if Args.Design == 'full':
+    Labels = LabelAtlas(device, ['On time', 'Delayed', 'Cancelled'])
+else:
+    Labels = LabelAtlas(device, [' Arriving', 'Delayed', 'Cancelled'] + [' %d min' % Minutes for Minutes in range(1, 15)])
+Departures = DepartureStore()
+Countdown = CountdownScheduler()
+Refresher = DataRefresher()
+# The first data is waited for, as there is nothing to show until it arrives.
+Refresher.fetch()
 board = boardFixed(image_composition, Args.Delay, device)
 FontTime = ImageFont.truetype(
     "%s/resources/time.otf" % (os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))), TimeSize)
@@ -0,0 +1,229 @@
+# This software was produced by Jonathan Foot (c) 2021, all rights reserved.
+# Project Website : https://departureboard.jonathanfoot.com
+# Documentation   : https://jonathanfoot.com/Projects/DepartureBoard
+# Description     : Used for development, times one of the departure boards playing back API responses saved with '--Record', so changes can be measured without the API.
+# Python 3 Required.
+#
+# Example, comparing the current Reading Buses board with an earlier commit on the same saved responses:
+#   python3 ReadingBusesPy3.py --Record recordings/rb -k APIKEY -s 039025980002     (leave running for a few refreshes, then ctrl-c)
+#   python3 benchmark.py ReadingBusesPy3.py recordings/rb --Shift --Profile
+#   python3 benchmark.py ReadingBusesPy3.py recordings/rb --Shift --Rev HEAD~5
+# Any options after '--' are given to the board, e.g. '-- -k APIKEY -s 039025980002'.
+
+import argparse
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import re
+import runpy
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+###
+# Below Declares all the program optional and compulsory settings/ start up paramters.
+###
+## Start Up Paramarter Checks
+# Checks value is greater than Zero.
+def check_positive(value):
+	try:
+		ivalue = int(value)
+		if ivalue <= 0:
+			raise argparse.ArgumentTypeError("%s is invalid, value must be an integer value greater than 0." % value)
+		return ivalue
+	except:
+		raise argparse.ArgumentTypeError("%s is invalid, value must be an integer value greater than 0." % value)
+
+## Defines all optional paramaters
+parser = argparse.ArgumentParser(description='Departure Board Benchmark, times a departure board playing back API responses saved with --Record.', epilog="Any options after '--' are given to the board.")
+parser.add_argument("Board", help="The departure board program to time, such as ReadingBusesPy3.py.")
+parser.add_argument("Replay", help="The folder of API responses saved by the board with '--Record'.")
+parser.add_argument("--Frames", type=check_positive, default=300, help="How many frames the board draws before it is stopped; default is 300.")
+parser.add_argument("--Repeat", type=check_positive, default=3, help="How many times the board is run, the fastest and middle times are shown; default is 3.")
+parser.add_argument("--ReplaySpeed", type=float, default=0, help="Given to the board, how many times faster than they were recorded the responses are played back, 0 plays each back as soon as it is requested; default is 0.")
+parser.add_argument("--Shift", action='store_true', help="Moves every date and time in the saved responses forward, so the first response is as if it was received now rather than when it was recorded. Times given only as a time of day (National Rail, Transport API) are not moved, so these should be played back at about the same time of day.")
+parser.add_argument("--Rev", help="Times the board as it was at this git revision instead of as it is now, such as HEAD~1. The revision must support '--Replay'.")
+parser.add_argument("--Profile", action='store_true', help="Also profiles one more run of the board, showing where its time was spent.")
+parser.add_argument("--Top", type=check_positive, default=15, help="When profiling, how many of the board's functions are shown; default is 15.")
+parser.add_argument("--Functions", nargs='+', default=[], help="When profiling, the names of the board's functions to always show, such as GetData GetDisplayTime.")
+parser.add_argument("--Timeout", type=check_positive, default=600, help="How long a run of the board can take before it is stopped; default is 600(seconds).")
+parser.add_argument("--Verbose", action='store_true', help="Shows everything the board outputs.")
+# Used to run the board once, within the process started by the benchmark.
+parser.add_argument("--Run", action='store_true', help=argparse.SUPPRESS)
+
+
+# Marks the line the results of one run are written on, so they can be told apart from the board's own output.
+Marker = "BENCHMARK "
+# Dates and times as given by the APIs, such as 2021-03-01T17:45:12.000+00:00.
+ISOTimes = re.compile(rb"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?")
+
+
+###
+# Below contains the code used to run the board once and time it, within its own process.
+###
+# Runs the board until it has drawn the wanted number of frames, writing how long it took as one line.
+# The first frame is timed from so starting up (loading fonts and the first data) is shown separately.
+def Run(Args):
+	boardArgs = [Args.Board, "--Replay", Args.Replay, "--ReplaySpeed", str(Args.ReplaySpeed), "--Display", "gifanim", "--max-frames", str(Args.Frames),
+		"--filename", os.devnull, "--no-splashscreen", "--EnergySaverMode", "none"] + Args.BoardArgs
+	first = {}
+	from luma.emulator.device import gifanim
+	display = gifanim.display
+	# Notes when the first frame was drawn, and does not keep any frames as the animation is never written.
+	def timedDisplay(self, image):
+		if not first:
+			first["wall"] = time.perf_counter()
+			first["cpu"] = time.process_time()
+		display(self, image)
+		self._images.clear()
+	gifanim.display = timedDisplay
+
+	profiles = []
+	if Args.Profile:
+		# Every thread is profiled, as the board gets new data in the background.
+		def profileThread(*args):
+			profile = cProfile.Profile()
+			profiles.append(profile)
+			profile.enable()
+		threading.setprofile(profileThread)
+		profiles.append(cProfile.Profile())
+		profiles[0].enable()
+
+	sys.argv = boardArgs
+	start = time.perf_counter()
+	code = None
+	try:
+		runpy.run_path(Args.Board, run_name="__main__")
+	except SystemExit as e:
+		code = e.code
+	end = time.perf_counter()
+	cpu = time.process_time()
+	for profile in profiles:
+		profile.disable()
+
+	# The emulator ends the program with 0 once it has drawn every frame, anything else means the board stopped on its own.
+	if code != 0 or not first:
+		print(Marker + json.dumps({"error": "The board stopped before drawing %d frames (%s)." % (Args.Frames, code)}), flush=True)
+		os._exit(1)
+	result = {"startup": first["wall"] - start, "wall": (end - first["wall"]) / max(1, Args.Frames - 1), "cpu": (cpu - first["cpu"]) / max(1, Args.Frames - 1)}
+	if profiles:
+		stats = pstats.Stats(profiles[0])
+		for profile in profiles[1:]:
+			stats.add(profile)
+		board = os.path.abspath(Args.Board)
+		result["functions"] = [[name, line, calls, total, cumulative] for (fileName, line, name), (primitive, calls, total, cumulative, callers) in stats.stats.items() if os.path.abspath(fileName) == board]
+	print(Marker + json.dumps(result), flush=True)
+	# The board's threads are never ended, so the process is stopped now.
+	os._exit(0)
+
+
+###
+# Below contains the code which prepares the board and saved responses, then runs the board as many times as needed.
+###
+# Copies the saved responses, moving every date and time forward so the first response is as if it was received now.
+def ShiftReplay(replay, folder):
+	with open("%s/index.jsonl" % replay) as file:
+		entries = [json.loads(line) for line in file]
+	shift = datetime.timedelta(seconds=time.time() - min(entry["time"] for entry in entries))
+
+	def shiftTime(match):
+		moved = datetime.datetime.fromisoformat(match.group(1).decode()) + shift
+		return moved.strftime("%Y-%m-%dT%H:%M:%S").encode() + (match.group(2) or b"") + (match.group(3) or b"")
+
+	for entry in entries:
+		with open("%s/%s" % (replay, entry["file"]), "rb") as file:
+			body = ISOTimes.sub(shiftTime, file.read())
+		with open("%s/%s" % (folder, entry["file"]), "wb") as file:
+			file.write(body)
+	shutil.copy("%s/index.jsonl" % replay, "%s/index.jsonl" % folder)
+	print("Moved the saved responses forward by %s." % str(shift).split(".")[0])
+
+# Writes the board as it was at the revision next to the board, so it finds the same fonts, returning where it was written.
+def BoardAtRev(board, rev):
+	folder = os.path.dirname(os.path.abspath(board))
+	name = os.path.basename(board)
+	source = subprocess.run(["git", "-C", folder, "show", "%s:./%s" % (rev, name)], check=True, capture_output=True).stdout
+	path = "%s/.benchmark-%s" % (folder, name)
+	with open(path, "wb") as file:
+		file.write(source)
+	return path
+
+# Runs the board once in a new process, so nothing is kept from one run to the next, returning the results.
+def RunBoard(Args, board, replay, profile):
+	command = [sys.executable, os.path.abspath(__file__), board, replay, "--Run", "--Frames", str(Args.Frames), "--ReplaySpeed", str(Args.ReplaySpeed)]
+	if profile:
+		command.append("--Profile")
+	command += ["--"] + Args.BoardArgs
+	try:
+		output = subprocess.run(command, capture_output=True, text=True, timeout=Args.Timeout).stdout
+	except subprocess.TimeoutExpired:
+		sys.exit("The board did not draw %d frames within %d seconds." % (Args.Frames, Args.Timeout))
+	lines = output.splitlines()
+	if Args.Verbose:
+		print("\n".join(line for line in lines if not line.startswith(Marker)))
+	results = [json.loads(line[len(Marker):]) for line in lines if line.startswith(Marker)]
+	if not results:
+		print(output)
+		sys.exit("The board did not finish, its output is above.")
+	if "error" in results[-1]:
+		print(output)
+		sys.exit(results[-1]["error"])
+	return results[-1]
+
+# Shows the functions of the board which took the most time, and any asked for.
+def ShowProfile(Args, result):
+	functions = sorted(result["functions"], key=lambda function: function[3], reverse=True)
+	shown = functions[:Args.Top] + [function for function in functions[Args.Top:] if function[0] in Args.Functions]
+	print("%-32s %10s %12s %12s %14s" % ("Function (board only)", "Calls", "Own ms", "Total ms", "Total us/call"))
+	for name, line, calls, total, cumulative in shown:
+		print("%-32s %10d %12.1f %12.1f %14.1f" % ("%s:%d" % (name, line), calls, total * 1000, cumulative * 1000, cumulative * 1e6 / calls))
+	print("Profiling slows the board down, so these times are only useful compared with each other.")
+
+
+def Main(Args):
+	board = Args.Board
+	replay = Args.Replay
+	shiftFolder = None
+	try:
+		if Args.Rev:
+			board = BoardAtRev(Args.Board, Args.Rev)
+		if Args.Shift:
+			shiftFolder = tempfile.mkdtemp(prefix="benchmark-")
+			ShiftReplay(Args.Replay, shiftFolder)
+			replay = shiftFolder
+
+		print("Timing %s%s, %d frames, %d runs, playing back %s." % (Args.Board, " at " + Args.Rev if Args.Rev else "", Args.Frames, Args.Repeat, Args.Replay))
+		results = [RunBoard(Args, board, replay, False) for i in range(Args.Repeat)]
+		for name, label in (("startup", "Starting up (s)"), ("wall", "Per frame (ms)"), ("cpu", "CPU per frame (ms)")):
+			times = [result[name] * (1 if name == "startup" else 1000) for result in results]
+			print("%-20s fastest %8.3f   middle %8.3f" % (label, min(times), statistics.median(times)))
+		print("A frame includes the board's own wait of 20ms between frames; the CPU time includes getting new data in the background.")
+
+		if Args.Profile:
+			ShowProfile(Args, RunBoard(Args, board, replay, True))
+	finally:
+		if board != Args.Board:
+			os.remove(board)
+		if shiftFolder:
+			shutil.rmtree(shiftFolder)
+
+
+if __name__ == "__main__":
+	# Everything after '--' is given to the board, rather than being read here.
+	argv = sys.argv[1:]
+	boardArgs = []
+	if "--" in argv:
+		argv, boardArgs = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+	Args = parser.parse_args(argv)
+	Args.BoardArgs = boardArgs
+	if Args.Run:
+		Run(Args)
+	else:
+		Main(Args)
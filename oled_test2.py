@@ -20,23 +20,42 @@ from luma.oled.device import ssd1322
 
 import time
 import sys
+import threading
+import heapq
+import gzip
+import base64
+import http.client
 
 import json
-from datetime import datetime
-from urllib.request import urlopen, Request
+from datetime import datetime, date
+from zoneinfo import ZoneInfo
+from urllib.parse import urlsplit, urljoin, unquote
+from urllib.request import getproxies, proxy_bypass_environment
+from concurrent.futures import ThreadPoolExecutor
 
 STATION_ID = "490008987N"
 STATION_ID2 = "490008613S"
 #STATION_ID = "490011842R"  # Hanover Park
+# Every stop shown on the display, their departures are merged into one list.
+STATION_IDS = [STATION_ID, STATION_ID2]
 
 API_ID = "2cbe9909205f4f62a92266395775cf5b"
 
+# The time zone the departure times are shown in.
+TIME_ZONE = "Europe/London"
+
+# Time limits for connecting to and waiting for a response from the TfL API, in seconds.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
+
 class ScrollingTextLines:
     """Handles the creation and scrolling of text lines with specific sequence"""
 
     MAX_PAGES = 3
     MAX_SCROLLABLE_LINES = MAX_PAGES * 3
     MAX_TOTAL_LINES = 1 + MAX_SCROLLABLE_LINES + 3  # header + scrollable + duplicate
+    # Each time is still shown up to and including the moment it is due to change, so they are checked just after
+    LABEL_MARGIN = 0.05
 
     def __init__(self, width=256, height=144):
         self.bitmap_width = width
@@ -59,6 +78,7 @@ class ScrollingTextLines:
         self.pause_time = 5.0
         self.scroll_time = 1.0
         self.at_wrap = False  # Track if we're at the wrap (duplicate page)
+        self.next_label_change = float('inf')  # When the soonest time shown changes
         # Allocate the double buffer once at max size
         self._allocate_double_buffer()
         self.set_line_data([])
@@ -84,6 +104,7 @@ class ScrollingTextLines:
         else:
             self.no_departures = False
             self.line_data = new_data[:10]  # Max 10 lines (including header)
+        self.next_label_change = self._next_label_change(self.line_data)
 
         self._rebuild_bitmaps()
         self.scroll_offset = 0  # Always reset scroll to top after new data
@@ -91,6 +112,11 @@ class ScrollingTextLines:
         self.at_wrap = False
         self.pending_line_data = None
 
+    def _next_label_change(self, lines):
+        """When the soonest time shown on the lines changes, so they are only checked then instead of every frame"""
+        changes = [change for change in (line.NextLabelChange() for line in lines) if change is not None]
+        return min(changes) + self.LABEL_MARGIN if changes else float('inf')
+
     def _rebuild_bitmaps(self):
         if self.no_departures:
             self.bitmap = None
@@ -206,13 +232,15 @@ class ScrollingTextLines:
                 self.set_line_data(self.pending_line_data)
                 return
 
-        # Check if the timestamps have changed to trigger data update
+        # Check if the timestamps have changed to trigger data update, only once the soonest is due to
         dirty = False
-        for line in self.line_data:
-            updated_display_time = line.GetDisplayTime()
-            if line.DisplayTime != updated_display_time:
-                line.DisplayTime = updated_display_time
-                dirty = True
+        if current_time >= self.next_label_change:
+            for line in self.line_data:
+                updated_display_time = line.GetDisplayTime()
+                if line.DisplayTime != updated_display_time:
+                    line.DisplayTime = updated_display_time
+                    dirty = True
+            self.next_label_change = self._next_label_change(self.line_data)
         if dirty:
             pending_line_data = self.line_data
             self.set_line_data(pending_line_data)
@@ -344,6 +372,169 @@ class ScrollingTextLines:
 
 
 
+# The result of a request, with the body already read and decompressed. It can be used in the same way as the response from urlopen.
+class HttpResponse():
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def read(self):
+        return self.body
+
+    def getcode(self):
+        return self.status
+
+# Keeps connections open to each website between requests, so each request does not pay for looking up the website and connecting (the TLS handshake) again.
+# Responses are requested compressed, and connecting and waiting for a response are both given a time limit so a bad connection can not hang the display.
+class HttpClient():
+    def __init__(self, connectTimeout, readTimeout):
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self.lock = threading.Lock()
+        # Open connections not currently in use, by scheme and host. More than one may be open when requests are made at the same time.
+        self.idle = {}
+        # The proxies set in the environment, by scheme.
+        self.proxies = getproxies()
+
+    # Returns the proxy to use for the host from the environment (HTTPS_PROXY, HTTP_PROXY and NO_PROXY) as urlopen does, or None to connect directly.
+    def proxy(self, scheme, host):
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass_environment(host, self.proxies):
+            return None
+        return urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+    # Returns the headers to log in to the proxy with, if it needs it.
+    @staticmethod
+    def ProxyHeaders(proxy):
+        if not proxy.username:
+            return {}
+        login = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(login.encode()).decode()}
+
+    # Returns an open connection to the host and whether it has been used before.
+    def connection(self, scheme, host):
+        with self.lock:
+            if self.idle.get((scheme, host)):
+                return self.idle[(scheme, host)].pop(), True
+        proxy = self.proxy(scheme, host)
+        if proxy is not None and scheme == "https":
+            # Secure requests are tunnelled through the proxy to the host.
+            conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+            conn.set_tunnel(host, headers=self.ProxyHeaders(proxy))
+        elif proxy is not None:
+            conn = http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=self.connectTimeout)
+        elif scheme == "https":
+            conn = http.client.HTTPSConnection(host, timeout=self.connectTimeout)
+        else:
+            conn = http.client.HTTPConnection(host, timeout=self.connectTimeout)
+        conn.connect()
+        conn.sock.settimeout(self.readTimeout)
+        return conn, False
+
+    def release(self, scheme, host, conn):
+        with self.lock:
+            self.idle.setdefault((scheme, host), []).append(conn)
+
+    # Makes a GET request, following any redirects, and returns a HttpResponse. Like urlopen an error is raised if the request failed.
+    def get(self, url, headers={}, redirects=3):
+        parts = urlsplit(url)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        sendHeaders = {"Accept-Encoding": "gzip", "User-Agent": "Mozilla/5.0"}
+        sendHeaders.update(headers)
+        proxy = self.proxy(parts.scheme, parts.netloc)
+        if proxy is not None and parts.scheme == "http":
+            # Plain requests through a proxy ask it for the whole URL.
+            path = url
+            sendHeaders.update(self.ProxyHeaders(proxy))
+
+        for attempt in range(2):
+            conn, reused = self.connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", path, headers=sendHeaders)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # The website may have closed a connection which had been left open, if so try again once with a new one.
+                if not reused or attempt == 1:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self.release(parts.scheme, parts.netloc, conn)
+
+        if response.getheader("Content-Encoding", "") == "gzip":
+            body = gzip.decompress(body)
+        if response.status in (301, 302, 303, 307, 308) and response.getheader("Location") and redirects > 0:
+            return self.get(urljoin(url, response.getheader("Location")), headers, redirects - 1)
+        if response.status >= 400:
+            raise Exception("HTTP Error %d: %s" % (response.status, response.reason))
+        return HttpResponse(response.status, response.msg, body)
+
+Http = HttpClient(CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+class Departure:
+    """The times of a service in seconds since the epoch, converted once when the data is retrieved instead of every frame"""
+    __slots__ = ("Scheduled", "Expected")
+    Zone = ZoneInfo(TIME_ZONE)
+    # The time zone's offset from UTC, worked out by Refresh().
+    Offset = 0
+    # The first day of the epoch, as counted by date.toordinal().
+    Epoch = date(1970, 1, 1).toordinal()
+
+    def __init__(self, Scheduled, Expected):
+        self.Scheduled = Scheduled
+        # The predicted time, None if it is not known.
+        self.Expected = Expected
+
+    def Best(self):
+        """The predicted time if known, else the time tabled time"""
+        return self.Scheduled if self.Expected is None else self.Expected
+
+    def MinutesUntil(self):
+        """Minutes until the service is due, negative once it should have already gone"""
+        return (self.Best() - time.time()) / 60
+
+    def NextChange(self, Due, Limit):
+        """When a count down to the time next changes: when it comes within Limit minutes, then as each whole minute passes until
+        it is within Due minutes. None once it will not change again"""
+        Seconds = self.Best()
+        left = Seconds - time.time()
+        if left <= Due * 60:
+            return None
+        if left >= Limit * 60:
+            return Seconds - Limit * 60
+        return Seconds - int(left // 60) * 60
+
+    @staticmethod
+    def Refresh():
+        """Works out the time zone's offset from UTC once each time new data is retrieved, instead of for every time shown"""
+        Departure.Offset = int(datetime.now(Departure.Zone).utcoffset().total_seconds())
+
+    @staticmethod
+    def FromUTC(Text):
+        """Converts a UTC date and time ("YYYY-MM-DDTHH:MM:SSZ") to seconds since the epoch, reading each field from where it always is"""
+        return (date(int(Text[0:4]), int(Text[5:7]), int(Text[8:10])).toordinal() - Departure.Epoch) * 86400 + int(Text[11:13]) * 3600 + int(Text[14:16]) * 60 + int(Text[17:19])
+
+    @staticmethod
+    def Clock(Seconds):
+        """A time in seconds since the epoch as shown on the display, in the time zone"""
+        return time.strftime("%H:%M", time.gmtime(Seconds + Departure.Offset))
+
+
 # Used to get live data from the TfL API and represent a specific services and it's details.
 class LiveTime(object):
     # The last time an API call was made to get new data.
@@ -352,43 +543,35 @@ class LiveTime(object):
     # * Change this method to implement your own API *
     def __init__(self, Data):
         self.Destination = str(Data['destinationName'])
-        self.ExptArrival = self.convertUTCtoLocal(str(Data['expectedArrival']))
+        # Only the predicted time is given. It is converted once, and used to sort and merge services without converting it again.
+        self.Times = Departure(None, Departure.FromUTC(str(Data['expectedArrival'])))
         self.DisplayTime = self.GetDisplayTime()
         self.ID = str(Data['id'])
         self.LineName = str(Data['lineName'])
         self.Via = "This is a %s line train, to %s" % (str(Data['lineName']), str(
             Data['destinationName'] if 'destinationName' in Data else str(Data['towards'])))
 
-    # The API gives time formats in UTC format, but during BST all times are one hour out. This corrects the issue.
-    def convertUTCtoLocal(self, dateTimeInput):
-        datetimeTemp = datetime.strptime(dateTimeInput, '%Y-%m-%dT%H:%M:%SZ')
-        datetimeTemp = datetimeTemp + (datetime.now() - datetime.utcnow())
-        return datetimeTemp.strftime('%Y-%m-%dT%H:%M:%S')
-
     # Returns the value to display the time on the board.
     def GetDisplayTime(self):
-        # Last time the display screen was updated to reflect the new time of arrival.
-        self.LastStaticUpdate = datetime.now()
-        if self.TimeInMin() <= 1:
+        Diff = self.TimeInMin()
+        if Diff <= 1:
             return ' Due'
-        elif self.TimeInMin() >= 15:
-            return ' ' + datetime.strptime(self.ExptArrival, '%Y-%m-%dT%H:%M:%S').strftime(
-                "%H:%M" )
+        elif Diff >= 15:
+            return ' ' + Departure.Clock(self.Times.Expected)
         else:
-            return ' %dmin' % self.TimeInMin()
+            return ' %dmin' % Diff
 
     def TimeInMin(self):
-        return (datetime.strptime(self.ExptArrival, '%Y-%m-%dT%H:%M:%S') - datetime.now()).total_seconds() / 60
+        return self.Times.MinutesUntil()
 
     # Returns true or false dependent upon if the last time an API data call was made was over the request limit; to prevent spamming the API feed.
     @staticmethod
     def TimePassed():
         return (datetime.now() - LiveTime.LastUpdate).total_seconds() > 15
 
-    # Return true or false dependent upon if the last time the display was updated was over the static update limit. This prevents updating the display to frequently to increase performance.
-    def TimePassedStatic(self):
-        return ("min" in self.DisplayTime) and (
-                    datetime.now() - self.LastStaticUpdate).total_seconds() > 15
+    # Returns when the time shown for the service next changes, in seconds since the epoch, or None if it will not change again.
+    def NextLabelChange(self):
+        return self.Times.NextChange(1, 15)
 
     # Calls the API and gets the data from it, returning a list of LiveTime objects to be used in the program.
     # * Change this method to implement your own API *
@@ -399,15 +582,14 @@ class LiveTime(object):
 
         url = "https://api.tfl.gov.uk/StopPoint/%s/Arrivals?app_id=%s&app_key=%s" % (station_id, API_ID,
                                                                                      API_ID)
-        req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
         try:
-            with urlopen(req) as conn:
+            with Http.get(url) as conn:
                 tempServices = json.loads(conn.read())
                 for service in tempServices:
                     # If not in excluded services list, convert custom API object to LiveTime object and add to list.
                     services.append(LiveTime(service))
 
-            services.sort(key=lambda x: x.TimeInMin())
+            services.sort(key=lambda x: x.Times.Expected)
             return services
         except Exception as e:
             print("GetData() ERROR")
@@ -498,13 +680,16 @@ def main():
         sys.exit(1)
 
 
-def obtain_realtime_data() -> list[Any]:
-    services = LiveTime.GetData(STATION_ID)
-    services2 = LiveTime.GetData(STATION_ID2)
-    services.extend(services2)
-    services.sort(key=lambda x: x.TimeInMin())
+def obtain_realtime_data(station_ids=STATION_IDS) -> list[Any]:
+    """Fetch every stop at the same time and merge their already sorted departures into one list."""
+    start = time.time()
+    Departure.Refresh()
+    with ThreadPoolExecutor(max_workers=len(station_ids)) as pool:
+        per_stop = list(pool.map(LiveTime.GetData, station_ids))
+    services = list(heapq.merge(*per_stop, key=lambda x: x.Times.Expected))
+    print(f"Fetched {len(station_ids)} stops in {time.time() - start:.2f}s")
     for svc in services:
-        print(f"Service {svc.LineName} to {svc.Destination} arriving at {svc.ExptArrival} (in {svc.DisplayTime})")
+        print(f"Service {svc.LineName} to {svc.Destination} arriving at {Departure.Clock(svc.Times.Expected)} (in {svc.DisplayTime})")
     return services
 
 